@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request database connection overhead with the configured settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'postgresql':
+            raise CommandError('Connection overhead is only meaningful against PostgreSQL')
+        count = options['requests']
+
+        def query(conn):
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+
+        # Floor: one query on a connection that is already open.
+        connection.ensure_connection()
+        floor = self.measure(count, lambda: query(connection))
+
+        # What every request paid before: a fresh connect and handshake.
+        params = connection.get_connection_params()
+
+        def fresh():
+            conn = connection.Database.connect(**params)
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            finally:
+                conn.close()
+
+        direct = self.measure(count, fresh)
+
+        # The real request cycle: request_started/request_finished run
+        # close_old_connections(), which honours CONN_MAX_AGE, health checks
+        # and returns pooled connections.
+        def cycle():
+            request_started.send(sender=self.__class__)
+            try:
+                query(connection)
+            finally:
+                request_finished.send(sender=self.__class__)
+
+        configured = self.measure(count, cycle)
+        connection.close()
+
+        if connection.pool:
+            mode = 'pool (max_size={})'.format(connection.pool.max_size)
+        else:
+            mode = 'CONN_MAX_AGE={}'.format(connection.settings_dict['CONN_MAX_AGE'])
+        self.stdout.write(f"{'path':28} {'ms/request':>10} {'overhead ms':>12}")
+        for name, seconds in (
+            ('query only', floor),
+            ('connect per request', direct),
+            (f'configured: {mode}', configured),
+        ):
+            self.stdout.write(f'{name:28} {seconds * 1000:>10.3f} {(seconds - floor) * 1000:>12.3f}')
+
+    @staticmethod
+    def measure(count, run):
+        started = time.perf_counter()
+        for _ in range(count):
+            run()
+        return (time.perf_counter() - started) / count
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from product.encoders import get_encoder
+from product.models import Category, Product, Review
+from product.serializers import CategorySerializer, ProductSerializer, ReviewSerializer
+
+TARGETS = (
+    (ProductSerializer, Product.objects.order_by('id')),
+    (CategorySerializer, Category.objects.order_by('id')),
+    (ReviewSerializer, Review.objects.order_by('id')),
+)
+
+
+class Command(BaseCommand):
+    help = 'Compare rows per second of the DRF serializers and the fast list encoders (parity is covered in product/tests.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'serializer':20} {'rows':>6} {'drf rows/s':>12} {'fast rows/s':>12} {'speedup':>8}")
+        for serializer_class, queryset in TARGETS:
+            encoder = get_encoder(serializer_class)
+            if encoder is None:
+                self.stdout.write(f'{serializer_class.__name__:20} not supported by the fast path')
+                continue
+            queryset = queryset[:options['rows']]
+
+            drf = self.measure(lambda: serializer_class(list(queryset.all()), many=True).data, options['repeat'])
+            fast = self.measure(lambda: encoder.encode_many(list(encoder.rows(queryset))), options['repeat'])
+            rows = queryset.count()
+            self.stdout.write(
+                f'{serializer_class.__name__:20} {rows:>6} {rows / drf:>12.0f} {rows / fast:>12.0f} {drf / fast:>7.1f}x'
+            )
+
+    @staticmethod
+    def measure(run, repeat):
+        # Best of N; database time is included on both sides.
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
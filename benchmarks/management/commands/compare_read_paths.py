@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.replay import Replayer, build_plan, load_scenario, percentile, summarize
+from product.models import Category, Product
+
+SCENARIO = Path(__file__).resolve().parents[2] / 'scenarios' / 'read_paths.jsonl'
+
+
+class Command(BaseCommand):
+    help = 'Compare throughput of the sync (WSGI) and async (ASGI) read paths at rising concurrency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi-url', required=True, help='e.g. http://localhost:7001')
+        parser.add_argument('--asgi-url', required=True, help='e.g. http://localhost:7002')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64])
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        placeholders = {
+            'product_id': list(Product.objects.values_list('id', flat=True)[:1000]),
+            'category_id': list(Category.objects.values_list('id', flat=True)[:1000]),
+        }
+        if not all(placeholders.values()):
+            raise CommandError('No data to replay against, run seed_benchmark_data first')
+        entries = load_scenario(SCENARIO)
+
+        self.stdout.write(f"{'path':6} {'concurrency':>11} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for concurrency in options['concurrency']:
+            for name, url, prefix in (('wsgi', options['wsgi_url'], ''), ('asgi', options['asgi_url'], 'async/')):
+                plan = build_plan(entries, options['requests'], {**placeholders, 'prefix': [prefix]}, seed=concurrency)
+                results, elapsed = Replayer(url, concurrency=concurrency).run(plan)
+                report = summarize(results, elapsed)
+                latencies = [result.seconds * 1000 for result in results]
+                p50, p95, p99 = (round(percentile(latencies, q), 2) for q in (0.50, 0.95, 0.99))
+                self.stdout.write(
+                    f"{name:6} {concurrency:>11} {report['throughput_rps']:>8} {p50:>8} {p95:>8} {p99:>8}"
+                )
@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from benchmarks.replay import Replayer, build_plan, load_scenario, summarize
+from product.models import Category, Product
+from users.models import CustomUser
+from users.serializers import CustomTokenObtainSerializer
+
+DEFAULT_SCENARIO = Path(__file__).resolve().parents[2] / 'scenarios' / 'catalog.jsonl'
+
+
+class Command(BaseCommand):
+    help = 'Replay a weighted request mix and report latency percentiles and query counts per route'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', nargs='?', default=str(DEFAULT_SCENARIO))
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--url', help='Base URL of a running server; in-process test client if omitted')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        entries = load_scenario(options['scenario'])
+        if not entries:
+            raise CommandError('Scenario is empty')
+
+        placeholders = {
+            'product_id': list(Product.objects.order_by('?').values_list('id', flat=True)[:1000]),
+            'category_id': list(Category.objects.values_list('id', flat=True)[:1000]),
+        }
+        if not all(placeholders.values()):
+            raise CommandError('No data to replay against, run seed_benchmark_data first')
+
+        plan = build_plan(entries, options['requests'], placeholders, options['seed'])
+        replayer = Replayer(options['url'], self.get_token(), options['concurrency'])
+
+        # QueryCountMiddleware only reports the query count header in DEBUG mode.
+        with override_settings(DEBUG=True if not options['url'] else settings.DEBUG):
+            results, elapsed = replayer.run(plan)
+        report = summarize(results, elapsed)
+
+        self.print_report(report)
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2))
+
+    def get_token(self):
+        user = CustomUser.objects.filter(is_active=True, is_staff=False, birthday__isnull=False).first()
+        if user is None:
+            return None
+        return str(CustomTokenObtainSerializer.get_token(user).access_token)
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{report['total_requests']} requests in {report['elapsed_seconds']}s "
+            f"({report['throughput_rps']} req/s)"
+        )
+        self.stdout.write(f"{'route':45} {'count':>6} {'err':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8}")
+        for route, stats in report['routes'].items():
+            self.stdout.write(
+                f"{route:45} {stats['count']:>6} {stats['errors']:>5} {stats['p50_ms']:>8} "
+                f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} {str(stats['avg_queries']):>8}"
+            )
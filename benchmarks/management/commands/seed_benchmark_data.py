@@ -0,0 +1,87 @@
+import random
+from datetime import date
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from product.counters import rebuild_products_count, rebuild_review_aggregates
+from product.models import Category, Product, Review
+from users.models import CustomUser
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+WORDS = ['phone', 'laptop', 'chair', 'table', 'lamp', 'book', 'shoes', 'jacket', 'watch', 'camera']
+
+
+class Command(BaseCommand):
+    help = 'Bulk-seed categories, products, reviews and users for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--products', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=50000)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        # Hashing is deliberately slow, so every seeded user shares one hash.
+        password = make_password(BENCHMARK_PASSWORD)
+
+        with transaction.atomic():
+            start = CustomUser.objects.count()
+            users = CustomUser.objects.bulk_create(
+                [
+                    CustomUser(
+                        email=f'bench{start + i}@example.com',
+                        password=password,
+                        is_active=True,
+                        birthday=date(1990, 1, 1),
+                    )
+                    for i in range(options['users'])
+                ],
+                batch_size=batch_size,
+            )
+            categories = Category.objects.bulk_create(
+                [Category(name=f'Category {i}') for i in range(options['categories'])],
+                batch_size=batch_size,
+            )
+            user_ids = [user.id for user in users]
+            category_ids = [category.id for category in categories]
+
+            product_ids = []
+            for offset in range(0, options['products'], batch_size):
+                count = min(batch_size, options['products'] - offset)
+                created = Product.objects.bulk_create([
+                    Product(
+                        title=f'{rng.choice(WORDS)} {offset + i}',
+                        description=' '.join(rng.choices(WORDS, k=8)),
+                        price=rng.randint(100, 99999) / 100,
+                        category_id=rng.choice(category_ids),
+                        owner_id=rng.choice(user_ids),
+                    )
+                    for i in range(count)
+                ])
+                product_ids += [product.id for product in created]
+
+            for offset in range(0, options['reviews'], batch_size):
+                count = min(batch_size, options['reviews'] - offset)
+                Review.objects.bulk_create([
+                    Review(
+                        text=' '.join(rng.choices(WORDS, k=5)),
+                        stars=rng.randint(1, 5),
+                        product_id=rng.choice(product_ids),
+                    )
+                    for _ in range(count)
+                ])
+
+            # bulk_create skips the signals that maintain the denormalized columns.
+            rebuild_products_count()
+            rebuild_review_aggregates(Product.objects.all())
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users, {len(categories)} categories, "
+            f"{len(product_ids)} products and {options['reviews']} reviews"
+        ))
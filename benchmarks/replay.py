@@ -0,0 +1,160 @@
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import requests
+from django.db import connections
+from django.test import Client
+from django.urls import Resolver404, resolve
+
+QUERY_COUNT_HEADER = 'X-DjangoQueryCount-Count'
+
+
+@dataclass
+class Result:
+    route: str
+    status: int
+    seconds: float
+    queries: int | None
+
+
+def load_scenario(path):
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                entries.append(json.loads(line))
+    return entries
+
+
+def render(value, placeholders, rng):
+    # Placeholders such as {product_id} are replaced by a random seeded id.
+    if isinstance(value, str):
+        for name, choices in placeholders.items():
+            token = '{' + name + '}'
+            while token in value:
+                value = value.replace(token, str(rng.choice(choices)), 1)
+        return value
+    if isinstance(value, dict):
+        return {key: render(item, placeholders, rng) for key, item in value.items()}
+    if isinstance(value, list):
+        return [render(item, placeholders, rng) for item in value]
+    return value
+
+
+def build_plan(entries, total, placeholders, seed):
+    rng = random.Random(seed)
+    weights = [entry.get('weight', 1) for entry in entries]
+    plan = []
+    for entry in rng.choices(entries, weights=weights, k=total):
+        plan.append({
+            'method': entry.get('method', 'GET').upper(),
+            'path': render(entry['path'], placeholders, rng),
+            'body': render(entry.get('body'), placeholders, rng),
+            'auth': entry.get('auth', False),
+            'name': entry.get('name'),
+        })
+    return plan
+
+
+def route_name(request):
+    if request['name']:
+        return request['name']
+    path = urlsplit(request['path']).path
+    try:
+        route = resolve(path).route
+    except Resolver404:
+        route = path
+    return f"{request['method']} /{route}"
+
+
+class Replayer:
+    """Executes a request plan in-process or against a running server."""
+
+    def __init__(self, base_url=None, token=None, concurrency=1):
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.token = token
+        self.concurrency = concurrency
+        self.local = threading.local()
+
+    def send(self, request):
+        headers = {}
+        if request['auth'] and self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        body = json.dumps(request['body']) if request['body'] is not None else None
+
+        started = time.perf_counter()
+        if self.base_url:
+            session = getattr(self.local, 'session', None)
+            if session is None:
+                session = self.local.session = requests.Session()
+            response = session.request(
+                request['method'], self.base_url + request['path'], data=body,
+                headers={**headers, 'Content-Type': 'application/json'}, timeout=60,
+            )
+            status, query_header = response.status_code, response.headers.get(QUERY_COUNT_HEADER)
+        else:
+            client = getattr(self.local, 'client', None)
+            if client is None:
+                client = self.local.client = Client()
+            response = client.generic(
+                request['method'], request['path'], data=body or '',
+                content_type='application/json', headers=headers,
+            )
+            status, query_header = response.status_code, response.get(QUERY_COUNT_HEADER)
+            if hasattr(response, 'streaming_content'):
+                for _ in response.streaming_content:
+                    pass
+        seconds = time.perf_counter() - started
+
+        queries = int(query_header) if query_header and query_header.isdigit() else None
+        return Result(route_name(request), status, seconds, queries)
+
+    def run(self, plan):
+        def send_and_release(request):
+            try:
+                return self.send(request)
+            finally:
+                if not self.base_url:
+                    connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(send_and_release, plan))
+        return results, time.perf_counter() - started
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(results, elapsed):
+    routes = defaultdict(list)
+    for result in results:
+        routes[result.route].append(result)
+
+    report = {'total_requests': len(results), 'elapsed_seconds': round(elapsed, 3),
+              'throughput_rps': round(len(results) / elapsed, 1) if elapsed else None,
+              'routes': {}}
+    for route, items in sorted(routes.items()):
+        latencies = [item.seconds * 1000 for item in items]
+        queries = [item.queries for item in items if item.queries is not None]
+        report['routes'][route] = {
+            'count': len(items),
+            'errors': sum(1 for item in items if item.status >= 400),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'avg_queries': round(sum(queries) / len(queries), 1) if queries else None,
+            'max_queries': max(queries) if queries else None,
+        }
+    return report
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.core.cache import cache
+
+# Non-blocking access to the default django-redis cache. Keys and values use
+# the same encoding as the sync backend, so both paths share entries.
+#
+# redis.asyncio connections belong to the loop that opened them. Under ASGI
+# there is one long-lived loop per thread; async views behind WSGI get a new
+# loop per request, so each client is closed when its loop shuts down.
+_local = threading.local()
+
+
+async def _close_with_loop(client):
+    # Event loops finalize async generators in shutdown_asyncgens() (called
+    # by asyncio.run() and asgiref) before closing, which runs this finally.
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+async def get_client():
+    loop = asyncio.get_running_loop()
+    if getattr(_local, 'loop', None) is not loop:
+        client = aioredis.from_url(settings.CACHES['default']['LOCATION'])
+        lifetime = _close_with_loop(client)
+        await lifetime.__anext__()
+        _local.loop, _local.client, _local.lifetime = loop, client, lifetime
+    return _local.client
+
+
+async def aget(key, default=None):
+    client = await get_client()
+    value = await client.get(cache.make_key(key))
+    if value is None:
+        return default
+    return cache.client.decode(value)
+
+
+async def aget_many(keys):
+    client = await get_client()
+    values = await client.mget([cache.make_key(key) for key in keys])
+    return {key: cache.client.decode(value) for key, value in zip(keys, values) if value is not None}
+
+
+async def aset(key, value, timeout):
+    client = await get_client()
+    await client.set(cache.make_key(key), cache.client.encode(value), ex=timeout)
+
+
+async def aadd(key, value, timeout=None):
+    client = await get_client()
+    return await client.set(cache.make_key(key), cache.client.encode(value), ex=timeout, nx=True)
@@ -0,0 +1,252 @@
+import json
+import os
+import pickle
+import threading
+import time
+import uuid
+
+import msgpack
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django_redis.cache import RedisCache
+from django_redis.serializers.base import BaseSerializer
+
+from common.lru import MISSING, LRUCache
+from common.metrics import CACHE_TIER_REQUESTS
+
+
+class CompactSerializer(BaseSerializer):
+    """
+    msgpack for plain JSON-like values, pickle for everything else.
+
+    The first byte tags the format. Values written by the default pickle
+    serializer start with the pickle opcode and still load.
+    """
+    MSGPACK = b'm'
+    PICKLE = b'p'
+
+    def dumps(self, value):
+        try:
+            return self.MSGPACK + msgpack.packb(
+                value, use_bin_type=True, strict_types=True, default=self._plain
+            )
+        except (TypeError, ValueError, OverflowError):
+            return self.PICKLE + pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, value):
+        tag, payload = value[:1], value[1:]
+        if tag == self.MSGPACK:
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        if tag == self.PICKLE:
+            return pickle.loads(payload)
+        return pickle.loads(value)
+
+    @staticmethod
+    def _plain(value):
+        # DRF hands out OrderedDict/ReturnDict/ReturnList. Tuples, Decimals and
+        # model instances raise and go through pickle so they round-trip as is.
+        if isinstance(value, dict):
+            return dict(value)
+        if isinstance(value, list):
+            return list(value)
+        raise TypeError(type(value).__name__)
+
+
+class TwoTierRedisCache(RedisCache):
+    """
+    django-redis backend with a bounded in-process LRU in front of Redis.
+
+    Every write drops the key from the local tier and publishes it on
+    ``INVALIDATION_CHANNEL``. A listener thread in each process evicts the
+    keys that other processes changed. A local entry can be stale for at most
+    ``LOCAL_TTL`` seconds, which covers messages lost while reconnecting.
+    Values served from the local tier are shared objects; treat them as
+    read-only.
+
+    Keys starting with one of ``LOCAL_EXCLUDE_PREFIXES`` skip the local tier
+    and never publish invalidations.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        options = params.get('OPTIONS', {})
+        self.local = LRUCache(
+            maxsize=int(options.get('LOCAL_MAXSIZE', 1024)),
+            ttl=float(options.get('LOCAL_TTL', 5)),
+        )
+        self.channel = options.get('INVALIDATION_CHANNEL', 'cache:invalidate')
+        self.exclude_prefixes = tuple(options.get('LOCAL_EXCLUDE_PREFIXES', ()))
+        self.stats = {'local_hit': 0, 'local_miss': 0, 'redis_hit': 0, 'redis_miss': 0}
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+        self._node = None
+
+    # Local tier
+
+    def _local_key(self, key, version):
+        if key.startswith(self.exclude_prefixes):
+            return None
+        return self.make_key(key, version=version)
+
+    def _count(self, tier, result):
+        self.stats[f'{tier}_{result}'] += 1
+        CACHE_TIER_REQUESTS.labels(tier, result).inc()
+
+    def _ensure_listener(self):
+        # Started lazily and again after a fork: threads do not survive
+        # fork(), and entries inherited from the parent may already be stale.
+        if self._listener_pid == os.getpid():
+            return
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+            self.local.clear()
+            self._node = uuid.uuid4().hex
+            thread = threading.Thread(target=self._listen, name='cache-invalidation', daemon=True)
+            thread.start()
+            self._listener_pid = os.getpid()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.get_client(write=False).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self._handle_invalidation(message['data'])
+            except Exception:
+                # Invalidations may have been missed while disconnected.
+                self.local.clear()
+                time.sleep(1)
+
+    def _handle_invalidation(self, data):
+        payload = json.loads(data)
+        if payload['node'] == self._node:
+            return
+        if payload['keys'] is None:
+            self.local.clear()
+            return
+        for key in payload['keys']:
+            self.local.delete(key)
+
+    def _invalidate(self, local_keys, everything=False):
+        if everything:
+            self.local.clear()
+        else:
+            local_keys = [key for key in local_keys if key is not None]
+            if not local_keys:
+                return
+            for key in local_keys:
+                self.local.delete(key)
+        payload = json.dumps({'node': self._node, 'keys': None if everything else local_keys})
+        self.client.get_client(write=True).publish(self.channel, payload)
+
+    # Reads
+
+    def get(self, key, default=None, version=None, client=None):
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            self._ensure_listener()
+            value = self.local.get(local_key)
+            if value is not MISSING:
+                self._count('local', 'hit')
+                return value
+            self._count('local', 'miss')
+
+        value = super().get(key, MISSING, version=version, client=client)
+        if value is MISSING or value is None:
+            self._count('redis', 'miss')
+            return default
+        self._count('redis', 'hit')
+        if local_key is not None:
+            self.local.set(local_key, value)
+        return value
+
+    def get_many(self, keys, version=None, client=None):
+        found = {}
+        remote = []
+        local_keys = {}
+        for key in keys:
+            local_key = self._local_key(key, version)
+            if local_key is None:
+                remote.append(key)
+                continue
+            self._ensure_listener()
+            value = self.local.get(local_key)
+            if value is MISSING:
+                self._count('local', 'miss')
+                remote.append(key)
+                local_keys[key] = local_key
+            else:
+                self._count('local', 'hit')
+                found[key] = value
+
+        if remote:
+            values = super().get_many(remote, version=version, client=client)
+            for key in remote:
+                if key not in values:
+                    self._count('redis', 'miss')
+                    continue
+                self._count('redis', 'hit')
+                found[key] = values[key]
+                if key in local_keys:
+                    self.local.set(local_keys[key], values[key])
+        return found
+
+    # Writes
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, client=None, nx=False, xx=False):
+        result = super().set(key, value, timeout=timeout, version=version, client=client, nx=nx, xx=xx)
+        if result or not nx:
+            self._invalidate([self._local_key(key, version)])
+        return result
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, client=None):
+        result = super().add(key, value, timeout=timeout, version=version, client=client)
+        if result:
+            self._invalidate([self._local_key(key, version)])
+        return result
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None, client=None):
+        result = super().set_many(data, timeout=timeout, version=version, client=client)
+        self._invalidate([self._local_key(key, version) for key in data])
+        return result
+
+    def delete(self, key, version=None, prefix=None, client=None):
+        result = super().delete(key, version=version, prefix=prefix, client=client)
+        self._invalidate([self._local_key(key, version)])
+        return result
+
+    def delete_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        result = super().delete_many(keys, version=version, client=client)
+        self._invalidate([self._local_key(key, version) for key in keys])
+        return result
+
+    def delete_pattern(self, *args, **kwargs):
+        result = super().delete_pattern(*args, **kwargs)
+        self._invalidate((), everything=True)
+        return result
+
+    def incr(self, key, delta=1, version=None, client=None, ignore_key_check=False):
+        result = super().incr(key, delta=delta, version=version, client=client, ignore_key_check=ignore_key_check)
+        self._invalidate([self._local_key(key, version)])
+        return result
+
+    def decr(self, key, delta=1, version=None, client=None):
+        result = super().decr(key, delta=delta, version=version, client=client)
+        self._invalidate([self._local_key(key, version)])
+        return result
+
+    def clear(self, *args, **kwargs):
+        result = super().clear(*args, **kwargs)
+        self._invalidate((), everything=True)
+        return result
+
+    def tier_stats(self):
+        local_total = self.stats['local_hit'] + self.stats['local_miss']
+        redis_total = self.stats['redis_hit'] + self.stats['redis_miss']
+        return {
+            **self.stats,
+            'local_size': len(self.local),
+            'local_hit_ratio': self.stats['local_hit'] / local_total if local_total else None,
+            'redis_hit_ratio': self.stats['redis_hit'] / redis_total if redis_total else None,
+        }
@@ -0,0 +1,52 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest())
+
+
+def not_modified(request, etag, last_modified=None):
+    """Return a 304 response when the request's validators still match, else None."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+class ConditionalRetrieveMixin:
+    """
+    Answers conditional GETs for a single object from ``version_fields``
+    before the object is loaded or serialized.
+
+    The first version field is used as ``Last-Modified`` and must be a
+    datetime that changes whenever the representation does.
+    """
+    version_fields = ('updated_at',)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        version = (
+            self.get_queryset()
+            .filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+            .values_list(*self.version_fields)
+            .first()
+        )
+        if version is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = make_etag(kwargs[lookup_url_kwarg], *version)
+        response = not_modified(request, etag, version[0])
+        if response is not None:
+            return response
+        return set_validators(super().retrieve(request, *args, **kwargs), etag, version[0])
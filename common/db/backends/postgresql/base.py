@@ -0,0 +1,26 @@
+import time
+
+from django.db.backends.postgresql import base
+
+from common.metrics import DB_CONNECTION_ACQUIRE
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend that records how long getting a connection takes."""
+
+    def get_new_connection(self, conn_params):
+        # With OPTIONS['pool'] this is the wait for a pooled connection,
+        # otherwise the full connect and authentication handshake.
+        mode = 'pool' if self.pool else 'connect'
+        started = time.perf_counter()
+        try:
+            return super().get_new_connection(conn_params)
+        finally:
+            DB_CONNECTION_ACQUIRE.labels(self.alias, mode).observe(time.perf_counter() - started)
+
+    def discard_after_fork(self):
+        # The socket and the pool belong to the parent process. close() would
+        # end the parent's session, so only forget them and let this process
+        # open its own.
+        self.connection = None
+        self._connection_pools.pop(self.alias, None)
@@ -0,0 +1,67 @@
+import os
+import time
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, multiprocess
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by route',
+    ['method', 'route'],
+)
+REQUESTS = Counter(
+    'http_requests_total', 'Requests by route and status code',
+    ['method', 'route', 'status'],
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per request',
+    ['route'], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200),
+)
+DB_TIME = Histogram(
+    'http_request_db_duration_seconds', 'Time spent in the database per request',
+    ['route'],
+)
+DB_CONNECTION_ACQUIRE = Histogram(
+    'db_connection_acquire_seconds', 'Time to open a database connection or take one from the pool',
+    ['alias', 'mode'], buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', 'Response cache lookups by result',
+    ['cache', 'result'],
+)
+CACHE_TIER_REQUESTS = Counter(
+    'cache_tier_requests_total', 'Two-tier cache lookups by tier and result',
+    ['tier', 'result'],
+)
+SERIALIZER_TIME = Histogram(
+    'serializer_duration_seconds', 'Time spent serializing lists',
+    ['serializer'],
+)
+CELERY_TASK_DURATION = Histogram(
+    'celery_task_duration_seconds', 'Celery task run time',
+    ['task', 'state'], buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300),
+)
+
+
+def get_registry():
+    # Gunicorn and Celery prefork run several processes; in that case every
+    # process writes its samples to PROMETHEUS_MULTIPROC_DIR.
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+class QueryTracker:
+    """Database execute wrapper that counts queries and their total time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
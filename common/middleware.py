@@ -0,0 +1,73 @@
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.backends.signals import connection_created
+
+from common.metrics import DB_QUERIES, DB_TIME, REQUEST_LATENCY, REQUESTS, QueryTracker
+
+# The tracker of the current request. Under ASGI the ORM runs in
+# sync_to_async threads with their own connections; the context (and with it
+# the tracker) is copied into those threads, so a wrapper installed on every
+# connection finds the right request.
+_current_tracker = ContextVar('query_tracker', default=None)
+
+
+def track_query(execute, sql, params, many, context):
+    tracker = _current_tracker.get()
+    if tracker is None:
+        return execute(sql, params, many, context)
+    return tracker(execute, sql, params, many, context)
+
+
+def install_query_tracking(sender, connection, **kwargs):
+    # Inserted first: execute_wrapper() blocks pop the last wrapper on exit.
+    if track_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, track_query)
+
+
+connection_created.connect(install_query_tracking)
+
+
+class MetricsMiddleware:
+    # Async-capable so ASGI requests to async views are not pushed to a thread.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        tracker = QueryTracker()
+        token = _current_tracker.set(tracker)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_tracker.reset(token)
+        self.observe(request, response, tracker, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        tracker = QueryTracker()
+        token = _current_tracker.set(tracker)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_tracker.reset(token)
+        self.observe(request, response, tracker, time.perf_counter() - started)
+        return response
+
+    def observe(self, request, response, tracker, elapsed):
+        match = request.resolver_match
+        route = match.route if match is not None else 'unmatched'
+        REQUEST_LATENCY.labels(request.method, route).observe(elapsed)
+        REQUESTS.labels(request.method, route, response.status_code).inc()
+        DB_QUERIES.labels(route).observe(tracker.count)
+        DB_TIME.labels(route).observe(tracker.seconds)
@@ -0,0 +1,143 @@
+import hashlib
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+from common import async_cache
+
+PRIMARY = 'default'
+PIN_SECONDS = 5
+PIN_KEY = 'primary_pin:{client}'
+HEALTH_TTL = 5
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Replica picked for the current request. Reads go to the primary unless
+# ReplicaRoutingMiddleware sets one, so Celery tasks and management commands
+# never see replica lag.
+_read_database = ContextVar('read_database', default=None)
+_health = {}
+
+
+def replica_aliases():
+    return getattr(settings, 'REPLICA_DATABASES', ())
+
+
+@contextmanager
+def use_primary():
+    token = _read_database.set(None)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+def is_healthy(alias):
+    healthy, checked_at = _health.get(alias, (None, 0.0))
+    if healthy is not None and time.monotonic() - checked_at < HEALTH_TTL:
+        return healthy
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+        healthy = True
+    except DatabaseError:
+        connections[alias].close()
+        healthy = False
+    _health[alias] = (healthy, time.monotonic())
+    return healthy
+
+
+def pick_replica():
+    aliases = list(replica_aliases())
+    random.shuffle(aliases)
+    for alias in aliases:
+        if is_healthy(alias):
+            return alias
+    return None
+
+
+class ReplicaRouter:
+    """
+    Sends reads of ``route_app_labels`` to the replica that
+    ReplicaRoutingMiddleware picked for the request. All writes, and reads
+    when no replica is healthy, go to the primary.
+    """
+    route_app_labels = {'product'}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in self.route_app_labels:
+            return None
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        if db in replica_aliases():
+            return False
+        return None
+
+
+def client_pin_key(request):
+    client = request.META.get('HTTP_AUTHORIZATION') or request.META.get('REMOTE_ADDR', '')
+    return PIN_KEY.format(client=hashlib.sha256(client.encode()).hexdigest()[:32])
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Picks one healthy replica per safe request, so all of its reads come
+    from the same server. After a client writes, its reads stay on the primary
+    for PIN_SECONDS so it sees its own changes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not replica_aliases():
+            return self.get_response(request)
+        pinned = request.method not in SAFE_METHODS or cache.get(client_pin_key(request)) is not None
+        token = _read_database.set(None if pinned else pick_replica())
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_database.reset(token)
+        if self.is_write(request, response):
+            cache.set(client_pin_key(request), 1, timeout=PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not replica_aliases():
+            return await self.get_response(request)
+        pinned = request.method not in SAFE_METHODS or await async_cache.aget(client_pin_key(request)) is not None
+        token = _read_database.set(None if pinned else await sync_to_async(pick_replica)())
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_database.reset(token)
+        if self.is_write(request, response):
+            await async_cache.aset(client_pin_key(request), 1, PIN_SECONDS)
+        return response
+
+    @staticmethod
+    def is_write(request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400
@@ -0,0 +1,9 @@
+from rest_framework import serializers
+
+from common.metrics import SERIALIZER_TIME
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        with SERIALIZER_TIME.labels(type(self.child).__name__).time():
+            return super().to_representation(data)
@@ -0,0 +1,81 @@
+import uuid
+
+from django_redis import get_redis_connection
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+# Sliding-window log kept in a sorted set. Trimming, counting and recording a
+# request happen atomically, in one round trip per check. Returns
+# {allowed, milliseconds until a slot frees up}.
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[4])
+    redis.call('PEXPIRE', KEYS[1], window)
+    return {1, 0}
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {0, tonumber(oldest[2]) + window - now}
+"""
+
+_script = None
+
+
+def run_sliding_window(key, limit, window_ms, now_ms):
+    global _script
+    if _script is None:
+        _script = get_redis_connection('default').register_script(SLIDING_WINDOW_SCRIPT)
+    allowed, wait_ms = _script(keys=[key], args=[now_ms, window_ms, limit, f'{now_ms}-{uuid.uuid4().hex}'])
+    return bool(allowed), wait_ms
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Scoped throttle backed by Redis. The rate comes from
+    DEFAULT_THROTTLE_RATES[view.throttle_scope].
+    """
+    scope_attr = 'throttle_scope'
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        # The scope is only known once the view is, see allow_request().
+        self.wait_ms = 0
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, self.wait_ms = run_sliding_window(
+            self.key, self.num_requests, self.duration * 1000, int(self.timer() * 1000)
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_ms / 1000
+
+
+class SlidingWindowIPThrottle(SlidingWindowThrottle):
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class SlidingWindowWriteThrottle(SlidingWindowThrottle):
+    # Limits unsafe methods per user (per IP for anonymous callers).
+    def get_cache_key(self, request, view):
+        if request.method in SAFE_METHODS:
+            return None
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
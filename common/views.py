@@ -0,0 +1,8 @@
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from common.metrics import get_registry
+
+
+def metrics_view(request):
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
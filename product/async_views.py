@@ -0,0 +1,113 @@
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from common import async_cache
+from common.routers import use_primary
+from common.conditional import make_etag, not_modified, set_validators
+from .cache import LIST_CACHE_TIMEOUT, amake_list_key, record
+from .filters import filter_products, latest_reviews_limit, order_by_rating, prefetch_latest_reviews
+from .models import Category, Product
+from .pagination import PAGE_SIZE
+from .serializers import (
+    CategorySerializer,
+    ProductSerializer,
+    ProductWithReviewsSerializer,
+    ProductListFilterValidateSerializer,
+)
+
+# Async counterparts of the hot read endpoints in views.py. They produce the
+# same payloads and share the product list cache entries with the sync views.
+PRODUCT_LIST_CACHE_MODELS = ('product', 'category', 'review')
+
+
+async def paginate(request, queryset, serializer_class):
+    try:
+        page = int(request.GET.get('page', '1'))
+    except ValueError:
+        page = 0
+    if page < 1:
+        return JsonResponse({'detail': 'Invalid page.'}, status=404)
+
+    total = await queryset.acount()
+    offset = (page - 1) * PAGE_SIZE
+    if page > 1 and offset >= total:
+        return JsonResponse({'detail': 'Invalid page.'}, status=404)
+    rows = [row async for row in queryset[offset:offset + PAGE_SIZE]]
+
+    url = request.build_absolute_uri()
+    next_link = replace_query_param(url, 'page', page + 1) if offset + PAGE_SIZE < total else None
+    if page == 1:
+        previous_link = None
+    elif page == 2:
+        previous_link = remove_query_param(url, 'page')
+    else:
+        previous_link = replace_query_param(url, 'page', page - 1)
+
+    return JsonResponse({
+        'total': total,
+        'next': next_link,
+        'previous': previous_link,
+        'results': serializer_class(rows, many=True).data,
+    })
+
+
+@require_GET
+async def product_list(request):
+    serializer = ProductListFilterValidateSerializer(data=request.GET)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    key = await amake_list_key('product_list', request.GET, PRODUCT_LIST_CACHE_MODELS)
+    etag = make_etag(key)
+    response = not_modified(request, etag)
+    if response is not None:
+        record('product_list', 'not_modified')
+        return response
+
+    data = await async_cache.aget(key)
+    if data is not None:
+        record('product_list', 'hit')
+        return set_validators(JsonResponse(data, safe=False), etag)
+
+    record('product_list', 'miss')
+    products = filter_products(Product.objects.all(), serializer.validated_data)
+    # Read from the primary for the same reason as CachedListMixin.
+    with use_primary():
+        data = ProductSerializer([product async for product in products], many=True).data
+    await async_cache.aset(key, data, LIST_CACHE_TIMEOUT)
+    return set_validators(JsonResponse(data, safe=False), etag)
+
+
+@require_GET
+async def product_detail(request, id):
+    version = await (
+        Product.objects.filter(id=id)
+        .values_list('updated_at', 'review_count', 'stars_sum')
+        .afirst()
+    )
+    if version is None:
+        return JsonResponse({'detail': 'No Product matches the given query.'}, status=404)
+    etag = make_etag(id, *version)
+    response = not_modified(request, etag, version[0])
+    if response is not None:
+        return response
+
+    try:
+        product = await Product.objects.aget(id=id)
+    except Product.DoesNotExist:
+        return JsonResponse({'detail': 'No Product matches the given query.'}, status=404)
+    return set_validators(JsonResponse(ProductSerializer(product).data), etag, version[0])
+
+
+@require_GET
+async def category_list(request):
+    return await paginate(request, Category.objects.order_by('id'), CategorySerializer)
+
+
+@require_GET
+async def product_with_reviews(request):
+    products = Product.objects.select_related('category').order_by('id')
+    products = prefetch_latest_reviews(products, latest_reviews_limit(request.GET))
+    products = order_by_rating(products, request.GET.get('ordering'))
+    return await paginate(request, products, ProductWithReviewsSerializer)
@@ -0,0 +1,138 @@
+import hashlib
+import time
+from functools import partial
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from common import async_cache
+from common.conditional import make_etag, not_modified
+from common.metrics import CACHE_REQUESTS
+from common.routers import use_primary
+
+LIST_CACHE_TIMEOUT = 60 * 15
+GENERATION_KEY = 'generation:{model}'
+
+
+def _generation_key(model_name):
+    return GENERATION_KEY.format(model=model_name)
+
+
+def get_generations(model_names):
+    keys = [_generation_key(name) for name in model_names]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # A lost counter must never fall back to a value that was used
+            # before, otherwise stale pages would become visible again.
+            cache.add(key, time.time_ns(), timeout=None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(model_name):
+    key = _generation_key(model_name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def bump_generation_on_commit(model_name, using=None):
+    """
+    Bump ``model_name`` once the current transaction commits. Repeated calls
+    in one transaction, e.g. a row per cascaded delete, queue a single bump.
+    """
+    # Scanning the queue rather than remembering the call keeps this right
+    # when a savepoint or the transaction rolls back and drops the callback.
+    connection = transaction.get_connection(using)
+    for _, func, _ in connection.run_on_commit:
+        if isinstance(func, partial) and func.func is bump_generation and func.args == (model_name,):
+            return
+    transaction.on_commit(partial(bump_generation, model_name), using=using)
+
+
+def normalize_query(query_params):
+    items = sorted(
+        (key, value)
+        for key in query_params
+        for value in query_params.getlist(key)
+    )
+    return urlencode(items)
+
+
+async def aget_generations(model_names):
+    keys = [_generation_key(name) for name in model_names]
+    generations = await async_cache.aget_many(keys)
+    for key in keys:
+        if key not in generations:
+            await async_cache.aadd(key, time.time_ns())
+            generations[key] = await async_cache.aget(key)
+    return [generations[key] for key in keys]
+
+
+def build_list_key(prefix, generations, query_params):
+    query = normalize_query(query_params)
+    digest = hashlib.md5(query.encode()).hexdigest()
+    version = '.'.join(str(generation) for generation in generations)
+    return f'list:{prefix}:{version}:{digest}'
+
+
+def make_list_key(prefix, query_params, model_names):
+    return build_list_key(prefix, get_generations(model_names), query_params)
+
+
+async def amake_list_key(prefix, query_params, model_names):
+    return build_list_key(prefix, await aget_generations(model_names), query_params)
+
+
+def record(prefix, event):
+    # Process-local on purpose: hits and 304s must not cost a Redis round trip.
+    CACHE_REQUESTS.labels(prefix, event).inc()
+
+
+class CachedListMixin:
+    """
+    Caches list responses per normalized query string.
+
+    Keys embed the generation counters of ``cache_models``; the counters are
+    bumped from model signals so a write invalidates every cached page at once.
+    Views whose URL selects the rows override ``get_cache_prefix()``;
+    ``cache_prefix`` alone labels the metrics.
+    """
+    cache_prefix = None
+    cache_models = ()
+    cache_timeout = LIST_CACHE_TIMEOUT
+
+    def get_cache_prefix(self):
+        return self.cache_prefix
+
+    def list(self, request, *args, **kwargs):
+        key = make_list_key(self.get_cache_prefix(), request.query_params, self.cache_models)
+        # The key already changes with every relevant write, so it doubles as
+        # the ETag and revalidation costs no database or cache payload reads.
+        etag = make_etag(key)
+        response = not_modified(request, etag)
+        if response is not None:
+            record(self.cache_prefix, 'not_modified')
+            return response
+
+        cached_data = cache.get(key)
+        if cached_data is not None:
+            record(self.cache_prefix, 'hit')
+            response = Response(data=cached_data, status=status.HTTP_200_OK)
+            response['ETag'] = etag
+            return response
+
+        record(self.cache_prefix, 'miss')
+        # The page is stored under the current generation. A lagging replica
+        # could fill it with rows from before the write that bumped it.
+        with use_primary():
+            response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout=self.cache_timeout)
+            response['ETag'] = etag
+        return response
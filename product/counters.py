@@ -0,0 +1,72 @@
+from collections import Counter
+
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Now
+
+from .models import Category, Product, Review
+
+
+def adjust_products_count(deltas):
+    """Apply ``{category_id: delta}`` to the denormalized counters."""
+    for category_id, delta in Counter(deltas).items():
+        if category_id is None or not delta:
+            continue
+        Category.objects.filter(pk=category_id).update(
+            products_count=F('products_count') + delta,
+            # The count is part of the category payload, keep Last-Modified honest.
+            updated_at=Now(),
+        )
+
+
+def adjust_review_aggregates(deltas):
+    """Apply ``{product_id: (count_delta, stars_delta)}`` to the rating columns."""
+    for product_id, (count_delta, stars_delta) in deltas.items():
+        if product_id is None or not (count_delta or stars_delta):
+            continue
+        Product.objects.filter(pk=product_id).update(
+            review_count=F('review_count') + count_delta,
+            stars_sum=F('stars_sum') + stars_delta,
+            # The rating is part of the product payload, keep Last-Modified honest.
+            updated_at=Now(),
+        )
+
+
+def products_count_subquery():
+    counts = (
+        Product.objects.filter(category=OuterRef('pk'))
+        .order_by()
+        .values('category')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def rebuild_products_count():
+    return Category.objects.update(products_count=products_count_subquery())
+
+
+def find_products_count_mismatches():
+    return (
+        Category.objects.annotate(actual=products_count_subquery())
+        .exclude(products_count=F('actual'))
+        .values_list('id', 'products_count', 'actual')
+    )
+
+
+def review_aggregate_subquery(aggregate):
+    totals = (
+        Review.objects.filter(product=OuterRef('pk'))
+        .order_by()
+        .values('product')
+        .annotate(total=aggregate)
+        .values('total')
+    )
+    return Coalesce(Subquery(totals), Value(0))
+
+
+def rebuild_review_aggregates(queryset):
+    return queryset.update(
+        review_count=review_aggregate_subquery(Count('id')),
+        stars_sum=review_aggregate_subquery(Sum('stars')),
+    )
@@ -0,0 +1,57 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FIELDS = ['id', 'title', 'description', 'price', 'category', 'owner']
+
+
+class Echo:
+    # csv.writer only needs an object with write(); return the line instead
+    # of buffering it so rows can be streamed one by one.
+    def write(self, value):
+        return value
+
+
+def export_columns(include):
+    columns = list(EXPORT_FIELDS)
+    if 'category' in include:
+        columns.append('category_name')
+    if 'rating' in include:
+        columns += ['review_count', 'rating']
+    return columns
+
+
+def export_rows(queryset, include):
+    values = ['id', 'title', 'description', 'price', 'category_id', 'owner_id']
+    if 'category' in include:
+        values.append('category__name')
+    if 'rating' in include:
+        values += ['review_count', 'stars_sum']
+
+    rows = queryset.order_by('id').values_list(*values).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for row in rows:
+        data = dict(zip(EXPORT_FIELDS, row[:6]))
+        data['price'] = str(data['price'])
+        extra = row[6:]
+        if 'category' in include:
+            data['category_name'], extra = extra[0], extra[1:]
+        if 'rating' in include:
+            review_count, stars_sum = extra
+            data['review_count'] = review_count
+            data['rating'] = round(stars_sum / review_count, 2) if review_count else None
+        yield data
+
+
+def stream_ndjson(queryset, include):
+    for data in export_rows(queryset, include):
+        yield json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def stream_csv(queryset, include):
+    columns = export_columns(include)
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for data in export_rows(queryset, include):
+        yield writer.writerow([data[column] for column in columns])
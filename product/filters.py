@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.db import connections
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, Prefetch, Q
+from django.db.models.functions import NullIf
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Review
+from .serializers import ProductListFilterValidateSerializer
+
+SEARCH_CONFIG = 'simple'
+
+# Every ordering ends with the primary key so pages are stable and match the
+# (category_id, price) / (owner_id, id) composite indexes.
+PRODUCT_ORDERING = {
+    'price': ('price', 'id'),
+    '-price': ('-price', '-id'),
+    'newest': ('-id',),
+}
+
+
+def filter_by_category_and_price(queryset, params):
+    if params.get('category') is not None:
+        queryset = queryset.filter(category_id=params['category'])
+    if params.get('min_price') is not None:
+        queryset = queryset.filter(price__gte=params['min_price'])
+    if params.get('max_price') is not None:
+        queryset = queryset.filter(price__lte=params['max_price'])
+    return queryset
+
+
+RATING_ORDERING = {
+    'rating': F('rating_value').asc(nulls_last=True),
+    '-rating': F('rating_value').desc(nulls_last=True),
+}
+
+
+class ProductFilterBackend(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        serializer = ProductListFilterValidateSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return filter_products(queryset, serializer.validated_data)
+
+
+def filter_products(queryset, params):
+    queryset = filter_by_category_and_price(queryset, params)
+    if params.get('owner') is not None:
+        queryset = queryset.filter(owner_id=params['owner'])
+    return queryset.order_by(*PRODUCT_ORDERING.get(params.get('ordering'), ('id',)))
+
+
+def order_by_rating(queryset, ordering):
+    ordering = RATING_ORDERING.get(ordering)
+    if ordering is None:
+        return queryset
+    return queryset.annotate(
+        rating_value=F('stars_sum') * 1.0 / NullIf(F('review_count'), 0)
+    ).order_by(ordering, 'id')
+
+
+def search_products(queryset, text):
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.filter(
+            Q(title__icontains=text) | Q(description__icontains=text)
+        ).order_by('id')
+
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    return (
+        queryset.annotate(
+            rank=SearchRank(F('search_vector'), query),
+            similarity=TrigramWordSimilarity(text, 'title'),
+        )
+        # Both branches are served by GIN indexes from migration 0004. The
+        # trigram match also finds title prefixes.
+        .filter(Q(search_vector=query) | Q(title__trigram_word_similar=text))
+        .order_by('-rank', '-similarity', 'id')
+    )
+
+
+def latest_reviews_limit(params):
+    try:
+        value = int(params.get('reviews'))
+    except (TypeError, ValueError):
+        return settings.LATEST_REVIEWS
+    if value < 0:
+        return settings.LATEST_REVIEWS
+    return min(value, settings.LATEST_REVIEWS_MAX)
+
+
+def prefetch_latest_reviews(queryset, limit):
+    # A sliced Prefetch is compiled into a single query filtered on
+    # ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY id DESC), so at
+    # most ``limit`` reviews per product are loaded.
+    return queryset.prefetch_related(
+        Prefetch('reviews', queryset=Review.objects.order_by('-id')[:limit], to_attr='latest_reviews')
+    )
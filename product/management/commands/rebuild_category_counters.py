@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from product.cache import bump_generation
+from product.counters import find_products_count_mismatches, rebuild_products_count
+
+
+class Command(BaseCommand):
+    help = 'Rebuild Category.products_count from the products table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report categories with wrong counters')
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            with transaction.atomic():
+                updated = rebuild_products_count()
+            # The bulk UPDATE fires no signals; cached pages show the counters.
+            bump_generation('category')
+            bump_generation('product')
+            self.stdout.write(f'Rebuilt counters for {updated} categories')
+
+        mismatches = list(find_products_count_mismatches())
+        for category_id, stored, actual in mismatches:
+            self.stdout.write(self.style.WARNING(
+                f'Category {category_id}: stored {stored}, actual {actual}'
+            ))
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f'{len(mismatches)} counters are out of sync'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All counters are in sync'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from product.cache import bump_generation
+from product.counters import rebuild_review_aggregates
+from product.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Backfill Product.review_count and Product.stars_sum in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_id = 0
+        total = 0
+        while True:
+            ids = list(
+                Product.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                total += rebuild_review_aggregates(Product.objects.filter(id__in=ids))
+            last_id = ids[-1]
+            self.stdout.write(f'Processed products up to id {last_id}')
+        # The bulk UPDATEs fire no signals; cached pages show the ratings.
+        bump_generation('category')
+        bump_generation('product')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rating aggregates for {total} products'))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 10:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_products_count(apps, schema_editor):
+    Category = apps.get_model('product', 'Category')
+    Product = apps.get_model('product', 'Product')
+    counts = (
+        Product.objects.filter(category=OuterRef('pk'))
+        .order_by()
+        .values('category')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Category.objects.update(products_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='products_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_products_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-18 10:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_review_aggregates(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    Review = apps.get_model('product', 'Review')
+
+    def subquery(aggregate):
+        totals = (
+            Review.objects.filter(product=OuterRef('pk'))
+            .order_by()
+            .values('product')
+            .annotate(total=aggregate)
+            .values('total')
+        )
+        return Coalesce(Subquery(totals), Value(0))
+
+    Product.objects.update(
+        review_count=subquery(Count('id')),
+        stars_sum=subquery(Sum('stars')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0002_category_products_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='stars_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_review_aggregates, migrations.RunPython.noop),
+    ]
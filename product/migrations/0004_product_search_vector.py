@@ -0,0 +1,61 @@
+# Generated by Django 5.2 on 2026-10-18 11:00
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# The search vector is kept up to date by a trigger so that bulk_create and
+# bulk_update maintain it as well as Model.save().
+CREATE_SEARCH_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION product_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER product_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON product_product
+    FOR EACH ROW EXECUTE FUNCTION product_search_vector_update()
+    """,
+    "UPDATE product_product SET title = title",
+    "CREATE INDEX product_search_vector_gin ON product_product USING gin (search_vector)",
+    "CREATE INDEX product_title_trgm ON product_product USING gin (title gin_trgm_ops)",
+]
+
+DROP_SEARCH_SQL = [
+    "DROP INDEX IF EXISTS product_title_trgm",
+    "DROP INDEX IF EXISTS product_search_vector_gin",
+    "DROP TRIGGER IF EXISTS product_search_vector_trigger ON product_product",
+    "DROP FUNCTION IF EXISTS product_search_vector_update()",
+]
+
+
+def run_on_postgresql(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0003_product_review_aggregates'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(run_on_postgresql(CREATE_SEARCH_SQL), run_on_postgresql(DROP_SEARCH_SQL)),
+    ]
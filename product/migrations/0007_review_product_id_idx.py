@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0006_timestamps'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', 'id'], name='review_product_id_idx'),
+        ),
+    ]
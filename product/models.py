@@ -1,7 +1,10 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from common.models import BaseModel
 from users.models import CustomUser
-class Category(models.Model):
+class Category(BaseModel):
     name = models.CharField(max_length=50)
+    products_count = models.PositiveIntegerField(default=0, editable=False)
     def __str__(self):
         return self.name
 
@@ -9,24 +12,39 @@ class Category(models.Model):
         verbose_name = 'Категория'
         verbose_name_plural = 'Категории'
 
-class Product(models.Model):
+class Product(BaseModel):
     title = models.CharField(max_length=50)
     description = models.TextField(null=True, blank=True)
     price = models.DecimalField(max_digits=5, decimal_places=2)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     owner = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='products')
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    stars_sum = models.PositiveIntegerField(default=0, editable=False)
+    # Filled by a database trigger, see migration 0004_product_search_vector.
+    search_vector = SearchVectorField(null=True, editable=False)
     def __str__(self):
         return self.title
 
+    @property
+    def rating(self):
+        if self.review_count:
+            return round(self.stars_sum / self.review_count, 2)
+        return None
+
     class Meta:
         verbose_name = 'Товар'
         verbose_name_plural = 'Товары'
+        indexes = [
+            models.Index(fields=['category', 'price', 'id'], name='product_category_price_idx'),
+            models.Index(fields=['owner', 'id'], name='product_owner_id_idx'),
+            models.Index(fields=['price', 'id'], name='product_price_id_idx'),
+        ]
 
 STARS =(
     (i,"⭐" * i) for i in range(1,6)
 )
 
-class Review(models.Model):
+class Review(BaseModel):
     text = models.TextField(null=True,blank=True)
     product = models.ForeignKey(Product, on_delete=models.CASCADE,related_name='reviews')
     stars = models.IntegerField(choices=STARS, default=5)
@@ -36,3 +54,6 @@ class Review(models.Model):
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = [
+            models.Index(fields=['product', 'id'], name='review_product_id_idx'),
+        ]
@@ -0,0 +1,221 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import F, OrderBy, Q
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+PAGE_SIZE = 5
+
+
+def estimate_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 until the table has been analyzed for the first time.
+    if row is None or row[0] < 0:
+        return queryset.count()
+    return row[0]
+
+
+def parse_order_term(term):
+    """Return ``(field, descending, nulls_last)``, or None for a term a cursor can't follow."""
+    if isinstance(term, str):
+        field = term.lstrip('-')
+        if term == '?' or LOOKUP_SEP in field:
+            return None
+        descending = term.startswith('-')
+        # Without NULLS FIRST/LAST, PostgreSQL sorts NULL as the largest value.
+        return field, descending, not descending
+    if isinstance(term, OrderBy) and isinstance(term.expression, F) and LOOKUP_SEP not in term.expression.name:
+        if term.nulls_last or term.nulls_first:
+            nulls_last = bool(term.nulls_last)
+        else:
+            nulls_last = not term.descending
+        return term.expression.name, term.descending, nulls_last
+    return None
+
+
+def is_nullable(queryset, field):
+    if field in queryset.query.annotations:
+        return True
+    try:
+        return queryset.model._meta.get_field(field).null
+    except FieldDoesNotExist:
+        return True
+
+
+def output_field(queryset, field):
+    if field in queryset.query.annotations:
+        return queryset.query.annotations[field].output_field
+    return queryset.model._meta.get_field(field)
+
+
+def order_term(field, descending, nulls_last):
+    if nulls_last is None:
+        return f'-{field}' if descending else field
+    nulls = {'nulls_last': True} if nulls_last else {'nulls_first': True}
+    return F(field).desc(**nulls) if descending else F(field).asc(**nulls)
+
+
+class CustomPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset mode.
+
+    Passing ``?cursor=`` switches to keyset pagination over ``(sort key, id)``,
+    where the sort key is the queryset's single ``order_by`` column or
+    annotation before ``id``; other orderings are rejected with a 400. In that
+    mode ``?count=exact|estimate|none`` controls how ``total`` is computed.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    keyset = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.keyset = True
+        return self.paginate_keyset(queryset, request)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            total = self.total
+        else:
+            total = self.page.paginator.count
+        return Response(OrderedDict([
+            ('total', total),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_page_size(self, request):
+        return PAGE_SIZE
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        return self.next_cursor and self.build_cursor_link(self.next_cursor)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        return self.previous_cursor and self.build_cursor_link(self.previous_cursor)
+
+    def paginate_keyset(self, queryset, request):
+        self.request = request
+        page_size = self.get_page_size(request)
+        field, descending, nulls_last, id_descending = self.get_keyset_ordering(queryset)
+        self.total = self.get_keyset_count(queryset, request)
+
+        cursor = self.decode_cursor(request.query_params.get(self.cursor_query_param),
+                                    output_field(queryset, field))
+        reverse = cursor is not None and cursor[2]
+        backwards = descending != reverse
+        id_backwards = id_descending != reverse
+        # Walking a page back also flips where the NULLs are met.
+        nulls_after = None if nulls_last is None else nulls_last != reverse
+
+        id_ordering = '-id' if id_backwards else 'id'
+        if field == 'id':
+            queryset = queryset.order_by(id_ordering)
+        else:
+            queryset = queryset.order_by(order_term(field, backwards, nulls_after), id_ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self.keyset_filter(field, cursor, backwards, id_backwards, nulls_after))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        has_next = True if reverse else has_more
+        has_previous = has_more if reverse else cursor is not None
+        self.next_cursor = None
+        self.previous_cursor = None
+        if rows and has_next:
+            self.next_cursor = self.encode_cursor(rows[-1], field, reverse=False)
+        if rows and has_previous:
+            self.previous_cursor = self.encode_cursor(rows[0], field, reverse=True)
+        return rows
+
+    def get_keyset_ordering(self, queryset):
+        """
+        Return ``(field, descending, nulls_last, id_descending)`` for the
+        queryset's ordering. Only a single column or annotation followed by
+        ``id`` can be continued from a cursor; any other ordering is rejected
+        rather than silently replaced. ``nulls_last`` is None when the sort key
+        can't be NULL.
+        """
+        terms = [parse_order_term(term) for term in queryset.query.order_by]
+        id_descending = None
+        if terms and terms[-1] is not None and terms[-1][0] in ('id', 'pk'):
+            id_descending = terms.pop()[1]
+        if None in terms or len(terms) > 1:
+            raise ValidationError({self.cursor_query_param: 'Cursor pagination is not supported for this ordering'})
+        if not terms:
+            return 'id', bool(id_descending), None, bool(id_descending)
+
+        field, descending, nulls_last = terms[0]
+        if not is_nullable(queryset, field):
+            nulls_last = None
+        return field, descending, nulls_last, descending if id_descending is None else id_descending
+
+    def get_keyset_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param, 'estimate')
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate' and not queryset.query.where:
+            return estimate_count(queryset)
+        return None
+
+    def keyset_filter(self, field, cursor, backwards, id_backwards, nulls_after):
+        value, last_id, _ = cursor
+        after_id = Q(**{f'id__{"lt" if id_backwards else "gt"}': last_id})
+        if field == 'id':
+            return after_id
+        if value is None:
+            null_ties = Q(**{f'{field}__isnull': True}) & after_id
+            return null_ties if nulls_after else null_ties | Q(**{f'{field}__isnull': False})
+
+        lookup = 'lt' if backwards else 'gt'
+        after = Q(**{f'{field}__{lookup}': value}) | (Q(**{field: value}) & after_id)
+        if nulls_after:
+            after |= Q(**{f'{field}__isnull': True})
+        return after
+
+    def encode_cursor(self, row, field, reverse):
+        payload = json.dumps([getattr(row, field), row.id, reverse], cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, encoded, sort_field):
+        if not encoded:
+            return None
+        try:
+            value, last_id, reverse = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            # The cursor comes from the client; its sort value must not reach
+            # the ORM unchecked.
+            if value is not None:
+                value = sort_field.to_python(value)
+            return value, int(last_id), bool(reverse)
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound('Invalid cursor')
+
+    def build_cursor_link(self, cursor):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
@@ -1,44 +1,43 @@
 from rest_framework import serializers
 from .models import Category, Product, Review
 from rest_framework.exceptions import ValidationError
+from common.serializers import TimedListSerializer
 
 class CategorySerializer(serializers.ModelSerializer):
-    products_count = serializers.SerializerMethodField()
-
     class Meta:
         model = Category
         fields = ['id', 'name', 'products_count']
-
-    def get_products_count(self, category):
-            return Product.objects.filter(category=category).count()
+        list_serializer_class = TimedListSerializer
 
 
 class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
 
 
 class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
-        fields = '__all__'
+        exclude = ['search_vector']
+        list_serializer_class = TimedListSerializer
 
 
 class ProductWithReviewsSerializer(serializers.ModelSerializer):
-    # reviews = ReviewSerializer(many=True, read_only=True)
+    # Only the latest reviews, see filters.prefetch_latest_reviews.
+    reviews = ReviewSerializer(source='latest_reviews', many=True, read_only=True)
+    reviews_count = serializers.IntegerField(source='review_count', read_only=True)
     rating = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
-        fields = ['id', 'title', 'description', 'price', 'category', 'reviews', 'rating']
+        fields = ['id', 'title', 'description', 'price', 'category', 'reviews', 'reviews_count', 'rating']
         depth = 1
+        list_serializer_class = TimedListSerializer
 
     def get_rating(self, obj):
-        reviews = obj.reviews.all()
-        if reviews.exists():
-            return round(sum([r.stars for r in reviews]) / reviews.count(), 2)
-        return None
+        return obj.rating
 
 
 class CategoryValidateSerializer(serializers.Serializer):
@@ -52,6 +51,12 @@ class ProductValidateSerializer(serializers.Serializer):
     category = serializers.IntegerField(min_value=1)
 
     def validate_category(self, category_id):
+        # Bulk imports resolve all categories up front and pass them in context.
+        categories = self.context.get('categories')
+        if categories is not None:
+            if category_id not in categories:
+                raise ValidationError('Category does not exist')
+            return categories[category_id]
         try:
             return Category.objects.get(id=category_id)
         except Category.DoesNotExist:
@@ -68,3 +73,25 @@ class ReviewValidateSerializer(serializers.Serializer):
             return Product.objects.get(id=product_id)
         except Product.DoesNotExist:
             raise ValidationError('Product does not exist')
+
+
+class ProductFilterValidateSerializer(serializers.Serializer):
+    category = serializers.IntegerField(required=False, min_value=1)
+    min_price = serializers.DecimalField(required=False, max_digits=10, decimal_places=2, min_value=0)
+    max_price = serializers.DecimalField(required=False, max_digits=10, decimal_places=2, min_value=0)
+
+    def validate(self, attrs):
+        min_price = attrs.get('min_price')
+        max_price = attrs.get('max_price')
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise ValidationError('min_price не может быть больше max_price')
+        return attrs
+
+
+class ProductListFilterValidateSerializer(ProductFilterValidateSerializer):
+    owner = serializers.IntegerField(required=False, min_value=1)
+    ordering = serializers.ChoiceField(required=False, choices=['price', '-price', 'newest'])
+
+
+class ProductSearchValidateSerializer(ProductFilterValidateSerializer):
+    q = serializers.CharField(required=True, min_length=1, max_length=100)
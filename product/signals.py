@@ -0,0 +1,79 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .cache import bump_generation_on_commit
+from .counters import adjust_products_count, adjust_review_aggregates
+from .models import Category, Product, Review
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Review)
+def invalidate_list_cache(sender, using, **kwargs):
+    # Bumped after commit: a read between the bump and the commit would store
+    # the old rows under the new generation.
+    bump_generation_on_commit(sender._meta.model_name, using=using)
+
+
+def deleted_with(origin, model):
+    # ``origin`` is the instance or queryset whose delete() started the
+    # cascade. When it is a parent row, the counters live on a row that is
+    # being deleted too, and updating them would cost a query per child.
+    if origin is None:
+        return False
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(origin_model, model)
+
+
+@receiver(post_init, sender=Product)
+def remember_product_category(sender, instance, **kwargs):
+    # Read from __dict__ so deferred loads don't trigger an extra query.
+    instance._loaded_category_id = instance.__dict__.get('category_id')
+
+
+@receiver(post_save, sender=Product)
+def update_products_count_on_save(sender, instance, created, **kwargs):
+    old_category_id = instance._loaded_category_id
+    if created:
+        adjust_products_count({instance.category_id: 1})
+    elif old_category_id is not None and old_category_id != instance.category_id:
+        adjust_products_count({old_category_id: -1, instance.category_id: 1})
+    instance._loaded_category_id = instance.category_id
+
+
+@receiver(post_delete, sender=Product)
+def update_products_count_on_delete(sender, instance, origin=None, **kwargs):
+    if deleted_with(origin, Category):
+        return
+    adjust_products_count({instance.category_id: -1})
+
+
+@receiver(post_init, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    instance._loaded_product_id = instance.__dict__.get('product_id')
+    instance._loaded_stars = instance.__dict__.get('stars')
+
+
+@receiver(post_save, sender=Review)
+def update_review_aggregates_on_save(sender, instance, created, **kwargs):
+    if created:
+        adjust_review_aggregates({instance.product_id: (1, instance.stars)})
+    elif instance._loaded_product_id is not None and instance._loaded_stars is not None:
+        deltas = {instance._loaded_product_id: (-1, -instance._loaded_stars)}
+        count_delta, stars_delta = deltas.get(instance.product_id, (0, 0))
+        deltas[instance.product_id] = (count_delta + 1, stars_delta + instance.stars)
+        adjust_review_aggregates(deltas)
+    instance._loaded_product_id = instance.product_id
+    instance._loaded_stars = instance.stars
+
+
+@receiver(post_delete, sender=Review)
+def update_review_aggregates_on_delete(sender, instance, origin=None, **kwargs):
+    # Reviews only cascade from their product, whichever row started it.
+    if origin is not None and not deleted_with(origin, Review):
+        return
+    adjust_review_aggregates({instance.product_id: (-1, -instance.stars)})
@@ -1,3 +1,197 @@
+import base64
+import json
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from users.models import CustomUser
+from .encoders import get_encoder
+from .filters import filter_products, order_by_rating, search_products
+from .models import Category, Product, Review
+from .pagination import CustomPagination
+from .serializers import CategorySerializer, ProductSerializer, ReviewSerializer
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are PostgreSQL specific')
+class ProductListIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user(email='owner@example.com', password='password')
+        cls.category = Category.objects.create(name='Phones')
+        Product.objects.bulk_create([
+            Product(title=f'Product {i}', price=i, category=cls.category, owner=cls.owner)
+            for i in range(1, 51)
+        ])
+
+    def explain(self, queryset):
+        # The tables are tiny, so a sequential scan would always win; disable
+        # it to check that the planner can use the composite indexes at all.
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_category_and_price_filter_uses_category_price_index(self):
+        products = filter_products(Product.objects.all(), {
+            'category': self.category.id, 'min_price': 10, 'max_price': 20, 'ordering': 'price',
+        })
+        self.assertIn('product_category_price_idx', self.explain(products))
+
+    def test_owner_listing_uses_owner_id_index(self):
+        products = filter_products(Product.objects.all(), {'owner': self.owner.id})
+        self.assertIn('product_owner_id_idx', self.explain(products))
+
+    def test_price_ordering_uses_price_id_index(self):
+        products = filter_products(Product.objects.all(), {'ordering': 'price'})
+        self.assertIn('product_price_id_idx', self.explain(products[:5]))
+
+    def test_search_uses_search_vector_and_trigram_indexes(self):
+        plan = self.explain(search_products(Product.objects.all(), 'Product'))
+        self.assertIn('product_search_vector_gin', plan)
+        self.assertIn('product_title_trgm', plan)
+        self.assertNotIn('Seq Scan on product_product', plan)
+
+
+class RowEncoderParityTests(TestCase):
+    """The fast list path must render exactly what the serializers render."""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = CustomUser.objects.create_user(email='seller@example.com', password='password')
+        cls.category = Category.objects.create(name='Laptops')
+        Category.objects.create(name='Empty')
+        products = [
+            Product.objects.create(title='Cheap', description=None, price=Decimal('0.5'),
+                                   category=cls.category, owner=owner),
+            Product.objects.create(title='Round', description='', price=Decimal('10'),
+                                   category=cls.category, owner=owner),
+            Product.objects.create(title='Юникод', description='Описание "с кавычками"',
+                                   price=Decimal('999.99'), category=cls.category, owner=owner),
+        ]
+        for stars, product in zip((1, 3, 5), products):
+            Review.objects.create(text=None if stars == 1 else f'{stars} stars', stars=stars, product=product)
+
+    def assert_same_output(self, serializer_class, queryset):
+        encoder = get_encoder(serializer_class)
+        self.assertIsNotNone(encoder)
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(encoder.encode_many(encoder.rows(queryset))),
+            renderer.render(serializer_class(queryset, many=True).data),
+        )
+
+    def test_products(self):
+        self.assert_same_output(ProductSerializer, Product.objects.order_by('id'))
+
+    def test_categories(self):
+        self.assert_same_output(CategorySerializer, Category.objects.order_by('id'))
+
+    def test_reviews(self):
+        self.assert_same_output(ReviewSerializer, Review.objects.order_by('id'))
+
+    def test_utc_timestamps_end_with_z(self):
+        with timezone.override('UTC'):
+            self.assert_same_output(ProductSerializer, Product.objects.order_by('id'))
+
+    def test_keyset_sort_column_is_not_rendered(self):
+        products = Product.objects.annotate(score=F('stars_sum') * 2).order_by('-score', 'id')
+        self.assert_same_output(ProductSerializer, products)
+
+
+class KeysetPaginationTests(TestCase):
+    """Walking the cursors must return rows in the same order as the queryset."""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = CustomUser.objects.create_user(email='keyset@example.com', password='password')
+        category = Category.objects.create(name='Tablets')
+        # Ties on price and rating, and products without reviews (NULL rating).
+        Product.objects.bulk_create([
+            Product(title=f'Product {i}', price=i % 4, category=category, owner=owner,
+                    review_count=i % 3, stars_sum=(i % 3) * (i % 5 + 1))
+            for i in range(13)
+        ])
+
+    def get_page(self, queryset, cursor):
+        request = Request(APIRequestFactory().get('/', {'cursor': cursor, 'count': 'none'}))
+        paginator = CustomPagination()
+        rows = paginator.paginate_queryset(queryset, request)
+        return [row.id for row in rows], paginator
+
+    def assert_walks_in_order(self, queryset):
+        expected = list(queryset.values_list('id', flat=True))
+        pages, cursor = [], ''
+        while cursor is not None:
+            ids, paginator = self.get_page(queryset, cursor)
+            pages.append(ids)
+            cursor = paginator.next_cursor
+        self.assertEqual([row_id for ids in pages for row_id in ids], expected)
+
+        # And back again through the previous cursors.
+        cursor = paginator.previous_cursor
+        for ids in reversed(pages[:-1]):
+            page, paginator = self.get_page(queryset, cursor)
+            self.assertEqual(page, ids)
+            cursor = paginator.previous_cursor
+
+    def test_column_orderings(self):
+        for ordering in ('price', '-price', 'newest', None):
+            with self.subTest(ordering=ordering):
+                self.assert_walks_in_order(filter_products(Product.objects.all(), {'ordering': ordering}))
+
+    def test_rating_orderings_keep_nulls_last(self):
+        for ordering in ('rating', '-rating'):
+            with self.subTest(ordering=ordering):
+                self.assert_walks_in_order(order_by_rating(Product.objects.all(), ordering))
+
+    def test_tampered_cursor_is_rejected(self):
+        queryset = order_by_rating(Product.objects.all(), 'rating')
+        for value in ('abc', {'rating': 1}, [1]):
+            cursor = base64.urlsafe_b64encode(json.dumps([value, 1, False]).encode()).decode()
+            with self.subTest(value=value), self.assertRaises(NotFound):
+                self.get_page(queryset, cursor)
+
+    def test_unsupported_ordering_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            self.get_page(Product.objects.order_by('-price', 'title', 'id'), '')
+
+
+class CascadeDeleteTests(TestCase):
+    """Counters on rows that are deleted too are left alone."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user(email='cascade@example.com', password='password')
+        cls.category = Category.objects.create(name='Cameras')
+        cls.other_category = Category.objects.create(name='Lenses')
+        for i in range(3):
+            product = Product.objects.create(title=f'Camera {i}', price=i, category=cls.category, owner=cls.owner)
+            for stars in range(1, 5):
+                Review.objects.create(text='ok', stars=stars, product=product)
+        cls.lens = Product.objects.create(title='Lens', price=1, category=cls.other_category, owner=cls.owner)
+        cls.review = Review.objects.create(text='sharp', stars=5, product=cls.lens)
+
+    def test_category_delete_runs_no_counter_updates(self):
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks() as callbacks:
+            self.category.delete()
+        self.assertEqual([query['sql'] for query in queries if query['sql'].startswith('UPDATE')], [])
+        # One generation bump per model, not one per deleted row.
+        self.assertEqual(len(callbacks), 3)
+
+    def test_review_delete_updates_aggregates(self):
+        self.review.delete()
+        self.lens.refresh_from_db()
+        self.assertEqual((self.lens.review_count, self.lens.stars_sum), (0, 0))
 
-# Create your tests here.
+    def test_owner_delete_updates_products_count(self):
+        self.owner.delete()
+        self.other_category.refresh_from_db()
+        self.assertEqual(self.other_category.products_count, 0)
@@ -1,10 +1,16 @@
 from django.urls import path, include
+from . import async_views
 from .views import (
     CategoryListCreateAPIView,
     CategoryDetailAPIView,
     ProductListCreateAPIView,
     ProductDetailAPIView,
+    ProductBulkAPIView,
+    ProductExportAPIView,
+    ProductSearchAPIView,
     ReviewViewSet,
+    ProductReviewListAPIView,
+    ProductReviewSummaryAPIView,
     ProductWithReviewsAPIView,
     OwnerProductListAPIView,
 )
@@ -12,8 +18,18 @@ from .views import (
 urlpatterns = [
     path('', ProductListCreateAPIView.as_view()),
     path('<int:id>/', ProductDetailAPIView.as_view()),
+    path('<int:id>/reviews/', ProductReviewListAPIView.as_view()),
+    path('<int:id>/reviews/summary/', ProductReviewSummaryAPIView.as_view()),
+    path('bulk/', ProductBulkAPIView.as_view()),
+    path('export/', ProductExportAPIView.as_view()),
+    path('search/', ProductSearchAPIView.as_view()),
     path('categories/', CategoryListCreateAPIView.as_view()),
     path('categories/<int:id>/', CategoryDetailAPIView.as_view()),
     path('reviews/', ProductWithReviewsAPIView.as_view()),
     path('my_products/', OwnerProductListAPIView.as_view()),
+
+    path('async/', async_views.product_list),
+    path('async/<int:id>/', async_views.product_detail),
+    path('async/categories/', async_views.category_list),
+    path('async/reviews/', async_views.product_with_reviews),
 ]
\ No newline at end of file
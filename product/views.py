@@ -1,18 +1,35 @@
-from collections import OrderedDict
+from collections import Counter
 from django.db import transaction
+from django.db.models import Avg, Count, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.parsers import JSONParser
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView, ListAPIView
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import AccessToken
-from django.core. cache import cache
 
+from .cache import CachedListMixin, bump_generation_on_commit
+from .counters import adjust_products_count
+from .encoders import FastListMixin
+from .export import stream_csv, stream_ndjson
+from .filters import (
+    ProductFilterBackend,
+    filter_by_category_and_price,
+    latest_reviews_limit,
+    order_by_rating,
+    prefetch_latest_reviews,
+    search_products,
+)
 from .models import Category, Product, Review
+from .pagination import CustomPagination
+from .parsers import NDJSONParser
 from .serializers import (
     CategorySerializer,
     ProductSerializer,
@@ -20,31 +37,23 @@ from .serializers import (
     ProductWithReviewsSerializer,
     CategoryValidateSerializer,
     ProductValidateSerializer,
-    ReviewValidateSerializer
+    ReviewValidateSerializer,
+    ProductSearchValidateSerializer,
 )
+from common.conditional import ConditionalRetrieveMixin
 from common.permissions import IsOwner, IsAnonymous, IsModeratorPermission
+from common.throttling import SlidingWindowWriteThrottle
+from users.authentication import CachedJWTAuthentication
 
-PAGE_SIZE = 5
-
-
-class CustomPagination(PageNumberPagination):
-    def get_paginated_response(self, data):
-        return Response(OrderedDict([
-            ('total', self.page.paginator.count),
-            ('next', self.get_next_link()),
-            ('previous', self.get_previous_link()),
-            ('results', data)
-        ]))
-
-    def get_page_size(self, request):
-        return PAGE_SIZE
 
-
-class CategoryListCreateAPIView(ListCreateAPIView):
+class CategoryListCreateAPIView(CachedListMixin, FastListMixin, ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     pagination_class = CustomPagination
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
+    cache_prefix = 'category_list'
+    # Product writes change products_count without saving the category.
+    cache_models = ('category', 'product')
 
     def post(self, request, *args, **kwargs):
         serializer = CategoryValidateSerializer(data=request.data)
@@ -55,10 +64,11 @@ class CategoryListCreateAPIView(ListCreateAPIView):
                         status=status.HTTP_201_CREATED)
 
 
-class CategoryDetailAPIView(RetrieveUpdateDestroyAPIView):
+class CategoryDetailAPIView(ConditionalRetrieveMixin, RetrieveUpdateDestroyAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     lookup_field = 'id'
+    version_fields = ('updated_at', 'products_count')
 
     def put(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -73,50 +83,53 @@ class CategoryDetailAPIView(RetrieveUpdateDestroyAPIView):
 
 from datetime import datetime, timedelta
 
-class ProductListCreateAPIView(ListCreateAPIView):
-    queryset = Product.objects.all()
-    serializer_class = ProductSerializer
 
-    def get(self, request, *args, **kwargs):
-        cached_data = cache.get('product_list')
-        if cached_data:
-            print("работает redis")
-            return Response(data=cached_data, status=status.HTTP_200_OK)
-        response = super().get(request, *args, **kwargs)
-        print("обычный response")
-        if response.data and len(response.data) > 0:
-            cache.set("product_list", response.data, timeout=120)
-        return response
+def check_product_creator(request):
+    if not request.user or not request.user.is_authenticated:
+        return Response({'detail': 'Authentication credentials were not provided.'},
+                        status=status.HTTP_401_UNAUTHORIZED)
 
-    def post(self, request, *args, **kwargs):
-        if not request.user or not request.user.is_authenticated:
-            return Response({'detail': 'Authentication credentials were not provided.'},
-                            status=status.HTTP_401_UNAUTHORIZED)
+    birthday_str = None
+    if request.auth:
+        birthday_str = request.auth.get('birthday')
 
-        birthday_str = None
-        if request.auth:
-            birthday_str = request.auth.get('birthday')
+    if not birthday_str:
+        return Response({'detail': 'Дата рождения не указана.'},
+                        status=status.HTTP_400_BAD_REQUEST)
 
-        if not birthday_str:
-            return Response({'detail': 'Дата рождения не указана.'},
-                            status=status.HTTP_400_BAD_REQUEST)
+    try:
+        birthday = datetime.fromisoformat(birthday_str).date()
+    except ValueError:
+        return Response({'detail': 'Неверный формат даты рождения в токене.'},
+                        status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            birthday = datetime.fromisoformat(birthday_str).date()
-        except ValueError:
-            return Response({'detail': 'Неверный формат даты рождения в токене.'},
-                            status=status.HTTP_400_BAD_REQUEST)
+    today = datetime.today().date()
+    age = (today - birthday).days // 365
+
+    if age < 18:
+        return Response({'detail': 'Вам должно быть 18 лет, чтобы создать продукт.'},
+                        status=status.HTTP_403_FORBIDDEN)
 
-        today = datetime.today().date()
-        age = (today - birthday).days // 365
+    if request.user.is_staff:
+        return Response({'detail': 'Модераторам запрещено создавать продукты.'},
+                        status=status.HTTP_403_FORBIDDEN)
 
-        if age < 18:
-            return Response({'detail': 'Вам должно быть 18 лет, чтобы создать продукт.'},
-                            status=status.HTTP_403_FORBIDDEN)
+    return None
 
-        if request.user.is_staff:
-            return Response({'detail': 'Модераторам запрещено создавать продукты.'},
-                            status=status.HTTP_403_FORBIDDEN)
+
+class ProductListCreateAPIView(CachedListMixin, FastListMixin, ListCreateAPIView):
+    throttle_classes = [SlidingWindowWriteThrottle]
+    throttle_scope = 'product_write'
+    queryset = Product.objects.all()
+    serializer_class = ProductSerializer
+    filter_backends = [ProductFilterBackend]
+    cache_prefix = 'product_list'
+    cache_models = ('product', 'category', 'review')
+
+    def post(self, request, *args, **kwargs):
+        error_response = check_product_creator(request)
+        if error_response is not None:
+            return error_response
 
         serializer = ProductValidateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -126,13 +139,14 @@ class ProductListCreateAPIView(ListCreateAPIView):
         price = serializer.validated_data.get('price')
         category = serializer.validated_data.get('category')
 
-        product = Product.objects.create(
-            title=title,
-            description=description,
-            price=price,
-            category=category,
-            owner=request.user,
-        )
+        with transaction.atomic():
+            product = Product.objects.create(
+                title=title,
+                description=description,
+                price=price,
+                category=category,
+                owner=request.user,
+            )
 
         return Response(data=ProductSerializer(product).data,
                         status=status.HTTP_201_CREATED)
@@ -140,11 +154,172 @@ class ProductListCreateAPIView(ListCreateAPIView):
 
 
 
-class ProductDetailAPIView(RetrieveUpdateDestroyAPIView):
+BULK_MAX_ITEMS = 5000
+BULK_BATCH_SIZE = 500
+BULK_UPDATE_FIELDS = ['title', 'description', 'price', 'category', 'updated_at']
+
+
+def as_int(value):
+    # Same coercion as serializers.IntegerField for ids ("2" == 2), without
+    # raising, so ids can be collected before validation.
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ProductBulkAPIView(APIView):
+    throttle_classes = [SlidingWindowWriteThrottle]
+    throttle_scope = 'product_write'
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def post(self, request):
+        error_response = check_product_creator(request)
+        if error_response is not None:
+            return error_response
+
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'detail': 'Ожидается массив товаров.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BULK_MAX_ITEMS:
+            return Response({'detail': f'Не больше {BULK_MAX_ITEMS} товаров за запрос.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        objects = [item for item in items if isinstance(item, dict)]
+        category_ids = {as_int(item.get('category')) for item in objects} - {None}
+        product_ids = {as_int(item.get('id')) for item in objects} - {None}
+        categories = Category.objects.in_bulk(category_ids)
+        products = Product.objects.filter(owner=request.user).in_bulk(product_ids)
+
+        now = timezone.now()
+        seen_ids = set()
+        errors = []
+        to_create = []
+        to_update = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({'index': index, 'errors': {'non_field_errors': ['Ожидается объект.']}})
+                continue
+
+            serializer = ProductValidateSerializer(data=item, context={'categories': categories})
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+
+            if item.get('id') is None:
+                to_create.append(Product(owner=request.user, **serializer.validated_data))
+                continue
+
+            product_id = as_int(item['id'])
+            product = products.get(product_id)
+            if product is None:
+                errors.append({'index': index, 'errors': {'id': ['Товар не найден.']}})
+                continue
+            if product_id in seen_ids:
+                # The same instance would be updated and counted twice.
+                errors.append({'index': index, 'errors': {'id': ['Товар повторяется в запросе.']}})
+                continue
+            seen_ids.add(product_id)
+            for field, value in serializer.validated_data.items():
+                setattr(product, field, value)
+            # bulk_update does not apply auto_now.
+            product.updated_at = now
+            to_update.append(product)
+
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        # bulk_create/bulk_update skip model signals, so counters and list cache
+        # generations are maintained here.
+        deltas = Counter(product.category_id for product in to_create)
+        for product in to_update:
+            if product._loaded_category_id != product.category_id:
+                deltas[product._loaded_category_id] -= 1
+                deltas[product.category_id] += 1
+
+        with transaction.atomic():
+            created = Product.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+            Product.objects.bulk_update(to_update, BULK_UPDATE_FIELDS, batch_size=BULK_BATCH_SIZE)
+            adjust_products_count(deltas)
+            bump_generation_on_commit('product')
+            bump_generation_on_commit('category')
+
+        return Response(
+            data={
+                'created': [product.id for product in created],
+                'updated': [product.id for product in to_update],
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+EXPORT_FORMATS = {
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+    'csv': (stream_csv, 'text/csv'),
+}
+
+
+class ProductExportAPIView(APIView):
+    def get(self, request):
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response({'detail': 'Поддерживаются форматы: ndjson, csv.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        stream, content_type = EXPORT_FORMATS[export_format]
+
+        include = set(filter(None, request.query_params.get('include', '').split(',')))
+        products = Product.objects.all()
+        for param, lookup in (('category', 'category_id'), ('owner', 'owner_id'), ('since_id', 'id__gt')):
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            value = as_int(value)
+            if value is None:
+                return Response({param: 'Ожидается целое число.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            products = products.filter(**{lookup: value})
+
+        updated_since = request.query_params.get('updated_since')
+        if updated_since is not None:
+            try:
+                updated_since = parse_datetime(updated_since)
+            except ValueError:
+                updated_since = None
+            if updated_since is None:
+                return Response({'updated_since': 'Ожидается дата и время в формате ISO 8601.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(updated_since):
+                updated_since = timezone.make_aware(updated_since)
+            products = products.filter(updated_at__gt=updated_since)
+
+        response = StreamingHttpResponse(stream(products, include), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="products.{export_format}"'
+        return response
+
+
+class ProductSearchAPIView(FastListMixin, ListAPIView):
+    serializer_class = ProductSerializer
+    pagination_class = CustomPagination
+
+    def get_queryset(self):
+        serializer = ProductSearchValidateSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        products = filter_by_category_and_price(Product.objects.all(), serializer.validated_data)
+        return search_products(products, serializer.validated_data['q'])
+
+
+class ProductDetailAPIView(ConditionalRetrieveMixin, RetrieveUpdateDestroyAPIView):
+    throttle_classes = [SlidingWindowWriteThrottle]
+    throttle_scope = 'product_write'
     queryset = Product.objects.select_related('category').all()
     serializer_class = ProductSerializer
     lookup_field = 'id'
     permission_classes = [IsOwner | IsModeratorPermission | IsAnonymous]
+    version_fields = ('updated_at', 'review_count', 'stars_sum')
 
     def put(self, request, *args, **kwargs):
         product = self.get_object()
@@ -155,18 +330,20 @@ class ProductDetailAPIView(RetrieveUpdateDestroyAPIView):
         product.description = serializer.validated_data.get('description')
         product.price = serializer.validated_data.get('price')
         product.category = serializer.validated_data.get('category')
-        product.save()
+        with transaction.atomic():
+            product.save()
 
         return Response(data=ProductSerializer(product).data)
 
-class OwnerProductListAPIView(ListAPIView):
+class OwnerProductListAPIView(FastListMixin, ListAPIView):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [ProductFilterBackend]
 
     def get_queryset(self):
         return Product.objects.filter(owner=self.request.user).select_related('category')
 
-class ReviewViewSet(ModelViewSet):
+class ReviewViewSet(FastListMixin, ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     pagination_class = CustomPagination
@@ -182,11 +359,12 @@ class ReviewViewSet(ModelViewSet):
         product = serializer.validated_data.get('product')
 
         # Create review
-        review = Review.objects.create(
-            text=text,
-            stars=stars,
-            product=product
-        )
+        with transaction.atomic():
+            review = Review.objects.create(
+                text=text,
+                stars=stars,
+                product=product
+            )
 
         return Response(data=ReviewSerializer(review).data,
                         status=status.HTTP_201_CREATED)
@@ -199,16 +377,54 @@ class ReviewViewSet(ModelViewSet):
         review.text = serializer.validated_data.get('text')
         review.stars = serializer.validated_data.get('stars')
         review.product = serializer.validated_data.get('product')
-        review.save()
+        with transaction.atomic():
+            review.save()
 
         return Response(data=ReviewSerializer(review).data)
 
 
-class ProductWithReviewsAPIView(APIView):
-    def get(self, request):
-        paginator = CustomPagination()
-        products = Product.objects.select_related('category').prefetch_related('reviews').all()
-        result_page = paginator.paginate_queryset(products, request)
+class ProductReviewListAPIView(CachedListMixin, FastListMixin, ListAPIView):
+    serializer_class = ReviewSerializer
+    pagination_class = CustomPagination
+    cache_prefix = 'product_reviews'
+    cache_models = ('review', 'product')
+
+    def get_cache_prefix(self):
+        return f"{self.cache_prefix}:{self.kwargs['id']}"
+
+    def get_queryset(self):
+        if not Product.objects.filter(id=self.kwargs['id']).exists():
+            raise NotFound('Товар не найден.')
+        # Served by review_product_id_idx, also in keyset mode.
+        return Review.objects.filter(product_id=self.kwargs['id']).order_by('-id')
+
+
+class ProductReviewSummaryAPIView(APIView):
+    def get(self, request, id):
+        summary = Review.objects.filter(product_id=id).aggregate(
+            count=Count('id'),
+            average=Avg('stars'),
+            **{f'stars_{stars}': Count('id', filter=Q(stars=stars)) for stars in range(1, 6)},
+        )
+        if not summary['count'] and not Product.objects.filter(id=id).exists():
+            raise NotFound('Товар не найден.')
+
+        average = summary['average']
+        return Response(data={
+            'product': id,
+            'count': summary['count'],
+            'average': round(average, 2) if average is not None else None,
+            'histogram': {str(stars): summary[f'stars_{stars}'] for stars in range(1, 6)},
+        })
+
 
-        serializer = ProductWithReviewsSerializer(result_page, many=True)
-        return paginator.get_paginated_response(serializer.data)
\ No newline at end of file
+class ProductWithReviewsAPIView(CachedListMixin, ListAPIView):
+    serializer_class = ProductWithReviewsSerializer
+    pagination_class = CustomPagination
+    cache_prefix = 'products_with_reviews'
+    cache_models = ('product', 'category', 'review')
+
+    def get_queryset(self):
+        products = Product.objects.select_related('category').all()
+        products = prefetch_latest_reviews(products, latest_reviews_limit(self.request.query_params))
+        return order_by_rating(products, self.request.query_params.get('ordering'))
\ No newline at end of file
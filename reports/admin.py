@@ -0,0 +1,15 @@
+from django.contrib import admin
+from .models import DailyCategoryStats, DailyUserStats
+
+
+class DailyCategoryStatsAdmin(admin.ModelAdmin):
+    list_display = ['day', 'category', 'new_products', 'new_reviews']
+    list_filter = ['category']
+
+
+class DailyUserStatsAdmin(admin.ModelAdmin):
+    list_display = ['day', 'new_users', 'activated_users']
+
+
+admin.site.register(DailyCategoryStats, DailyCategoryStatsAdmin)
+admin.site.register(DailyUserStats, DailyUserStatsAdmin)
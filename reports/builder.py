@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import DailyCategoryStats, DailyUserStats
+
+CATEGORY_FIELDS = ['new_products', 'new_reviews', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5']
+
+
+def build_daily_report(days=1, today=None):
+    """Summarize the last ``days`` days using only the rollup tables."""
+    today = today or timezone.localdate()
+    start = today - timedelta(days=days - 1)
+
+    categories = (
+        DailyCategoryStats.objects.filter(day__range=(start, today))
+        .values('category_id', 'category__name')
+        .annotate(**{field: Sum(field) for field in CATEGORY_FIELDS})
+        .order_by('category__name')
+    )
+    users = DailyUserStats.objects.filter(day__range=(start, today)).aggregate(
+        new_users=Sum('new_users'), activated_users=Sum('activated_users'),
+    )
+
+    rows = []
+    for row in categories:
+        stars = {stars: row[f'stars_{stars}'] for stars in range(1, 6)}
+        stars_sum = sum(stars * count for stars, count in stars.items())
+        rows.append({
+            'category': row['category__name'],
+            'new_products': row['new_products'],
+            'new_reviews': row['new_reviews'],
+            'stars': stars,
+            'rating': round(stars_sum / row['new_reviews'], 2) if row['new_reviews'] else None,
+        })
+
+    return {
+        'start': start,
+        'end': today,
+        'categories': rows,
+        'new_users': users['new_users'] or 0,
+        'activated_users': users['activated_users'] or 0,
+    }
+
+
+def render_report(report):
+    lines = [
+        f"Отчёт за {report['start']} — {report['end']}",
+        f"Новых пользователей: {report['new_users']}, активировано: {report['activated_users']}",
+        '',
+    ]
+    for row in report['categories']:
+        stars = ' '.join(f'{stars}⭐:{count}' for stars, count in row['stars'].items())
+        lines.append(
+            f"{row['category']}: товаров {row['new_products']}, отзывов {row['new_reviews']}, "
+            f"рейтинг {row['rating']} ({stars})"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('product', '0005_product_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyUserStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('new_users', models.PositiveIntegerField(default=0)),
+                ('activated_users', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Статистика пользователей за день',
+                'verbose_name_plural': 'Статистика пользователей по дням',
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_time', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyCategoryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('new_products', models.PositiveIntegerField(default=0)),
+                ('new_reviews', models.PositiveIntegerField(default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='product.category')),
+            ],
+            options={
+                'verbose_name': 'Статистика категории за день',
+                'verbose_name_plural': 'Статистика категорий по дням',
+                'constraints': [models.UniqueConstraint(fields=('day', 'category'), name='unique_daily_category_stats')],
+            },
+        ),
+    ]
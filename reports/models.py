@@ -0,0 +1,45 @@
+from django.db import models
+from product.models import Category
+
+
+class DailyCategoryStats(models.Model):
+    day = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_stats')
+    new_products = models.PositiveIntegerField(default=0)
+    new_reviews = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.day} {self.category_id}'
+
+    class Meta:
+        verbose_name = 'Статистика категории за день'
+        verbose_name_plural = 'Статистика категорий по дням'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'category'], name='unique_daily_category_stats'),
+        ]
+
+
+class DailyUserStats(models.Model):
+    day = models.DateField(unique=True)
+    new_users = models.PositiveIntegerField(default=0)
+    activated_users = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return str(self.day)
+
+    class Meta:
+        verbose_name = 'Статистика пользователей за день'
+        verbose_name_plural = 'Статистика пользователей по дням'
+
+
+class RollupWatermark(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    last_time = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,98 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from product.models import Product, Review
+from users.models import CustomUser
+from .models import DailyCategoryStats, DailyUserStats, RollupWatermark
+
+# How long a transaction may stay open and still have its rows counted.
+ROLLUP_LAG = timedelta(minutes=5)
+
+
+def increment(model, lookup, **increments):
+    row, _ = model.objects.get_or_create(**lookup)
+    model.objects.filter(pk=row.pk).update(
+        **{field: F(field) + value for field, value in increments.items() if value}
+    )
+
+
+def lock_watermark(name):
+    RollupWatermark.objects.get_or_create(name=name)
+    return RollupWatermark.objects.select_for_update().get(name=name)
+
+
+def is_behind(watermark, cutoff):
+    # Also guards against moving a watermark back, which would count rows twice.
+    return watermark.last_time is None or watermark.last_time < cutoff
+
+
+def new_rows(watermark, queryset, field, cutoff):
+    # Rows are picked by timestamp rather than by id: ids are handed out at
+    # insert time, so a transaction that commits after a run can hold ids
+    # below the ones already counted. Stopping ROLLUP_LAG short of now leaves
+    # such transactions that much time to commit before their rows are read.
+    queryset = queryset.filter(**{f'{field}__lte': cutoff})
+    if watermark.last_time is not None:
+        queryset = queryset.filter(**{f'{field}__gt': watermark.last_time})
+    return queryset.order_by()
+
+
+def rollup_products(cutoff):
+    watermark = lock_watermark('products')
+    if not is_behind(watermark, cutoff):
+        return
+    rows = new_rows(watermark, Product.objects.all(), 'created_at', cutoff)
+    rows = rows.annotate(day=TruncDate('created_at')).values('day', 'category_id')
+    for row in rows.annotate(total=Count('id')):
+        increment(DailyCategoryStats, {'day': row['day'], 'category_id': row['category_id']},
+                  new_products=row['total'])
+    watermark.last_time = cutoff
+    watermark.save()
+
+
+def rollup_reviews(cutoff):
+    watermark = lock_watermark('reviews')
+    if not is_behind(watermark, cutoff):
+        return
+    rows = new_rows(watermark, Review.objects.all(), 'created_at', cutoff)
+    totals = defaultdict(lambda: defaultdict(int))
+    rows = rows.annotate(day=TruncDate('created_at')).values('day', 'product__category_id', 'stars')
+    for row in rows.annotate(total=Count('id')):
+        category_totals = totals[row['day'], row['product__category_id']]
+        category_totals['new_reviews'] += row['total']
+        category_totals[f"stars_{row['stars']}"] += row['total']
+    for (day, category_id), increments in totals.items():
+        increment(DailyCategoryStats, {'day': day, 'category_id': category_id}, **increments)
+    watermark.last_time = cutoff
+    watermark.save()
+
+
+def rollup_users(cutoff):
+    watermark = lock_watermark('users')
+    if not is_behind(watermark, cutoff):
+        return
+    joined = CustomUser.objects.filter(date_joined__lte=cutoff)
+    activations = CustomUser.objects.filter(activated_at__lte=cutoff)
+    if watermark.last_time is not None:
+        joined = joined.filter(date_joined__gt=watermark.last_time)
+        activations = activations.filter(activated_at__gt=watermark.last_time)
+    for row in joined.annotate(day=TruncDate('date_joined')).values('day').annotate(total=Count('id')):
+        increment(DailyUserStats, {'day': row['day']}, new_users=row['total'])
+    for row in activations.annotate(day=TruncDate('activated_at')).values('day').annotate(total=Count('id')):
+        increment(DailyUserStats, {'day': row['day']}, activated_users=row['total'])
+    watermark.last_time = cutoff
+    watermark.save()
+
+
+def update_rollups(now=None):
+    now = now or timezone.now()
+    with transaction.atomic():
+        cutoff = now - ROLLUP_LAG
+        rollup_products(cutoff)
+        rollup_reviews(cutoff)
+        rollup_users(cutoff)
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .rollups import update_rollups
+
+
+@shared_task(ignore_result=True)
+def update_daily_rollups():
+    update_rollups()
@@ -1,7 +1,11 @@
 import os
 
+import time
+
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import task_postrun, task_prerun, worker_process_init, worker_ready
+from kombu import Queue
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shop_api.settings')
@@ -17,13 +21,78 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
+# OTP emails get their own queue (and worker) so long-running reports can
+# never delay registration codes.
+app.conf.task_queues = (
+    Queue('otp', routing_key='otp'),
+    Queue('default', routing_key='default'),
+    Queue('reports', routing_key='reports'),
+)
+app.conf.task_default_queue = 'default'
+app.conf.task_routes = {
+    'users.tasks.send_opt_email': {'queue': 'otp', 'priority': 0},
+    'users.tasks.flush_otp_emails': {'queue': 'otp', 'priority': 0},
+    'users.tasks.send_daily_report': {'queue': 'reports', 'priority': 9},
+    'reports.tasks.update_daily_rollups': {'queue': 'reports', 'priority': 9},
+}
+# With the Redis broker 0 is the highest priority.
+app.conf.task_default_priority = 5
+app.conf.broker_transport_options = {
+    'priority_steps': list(range(10)),
+    'queue_order_strategy': 'priority',
+}
+app.conf.worker_prefetch_multiplier = 1
+
 app.conf.beat_schedule = {
+    "update_daily_rollups": {
+        "task": "reports.tasks.update_daily_rollups",
+        "schedule": crontab(minute='*/15'),
+    },
+    # Once a day; the report covers the previous full local day.
     "send_daily_report": {
         "task": "users.tasks.send_daily_report",
-        "schedule": crontab(minute=30),
+        "schedule": crontab(hour=0, minute=30),
     },
     "clear_old_logs": {
         "task": "users.tasks.clear_old_logs",
         "schedule": crontab(hour=0, minute=0),
     },
 }
+
+
+_task_started = {}
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def observe_task_duration(task_id=None, task=None, state=None, **kwargs):
+    from common.metrics import CELERY_TASK_DURATION
+
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        CELERY_TASK_DURATION.labels(task.name, state or 'UNKNOWN').observe(time.perf_counter() - started)
+
+
+@worker_ready.connect
+def start_metrics_server(**kwargs):
+    # Workers have no HTTP endpoint of their own, expose one when asked to.
+    port = os.environ.get('CELERY_METRICS_PORT')
+    if port:
+        from prometheus_client import start_http_server
+        from common.metrics import get_registry
+
+        start_http_server(int(port), registry=get_registry())
+
+
+@worker_process_init.connect
+def discard_inherited_connections(**kwargs):
+    # Prefork children must not share the parent's sockets or pool threads.
+    from django.db import connections
+
+    for connection in connections.all(initialized_only=True):
+        if hasattr(connection, 'discard_after_fork'):
+            connection.discard_after_fork()
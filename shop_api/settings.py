@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'product',
     'users',
@@ -46,9 +47,13 @@ INSTALLED_APPS = [
     'drf_yasg',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
+    'benchmarks',
+    'reports',
 ]
 
 MIDDLEWARE = [
+    'common.middleware.MetricsMiddleware',
+    'common.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,10 +66,20 @@ MIDDLEWARE = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication'
+        'users.authentication.CachedTokenAuthentication',
+        'users.authentication.CachedJWTAuthentication'
         # 'rest_framework.authentication.SessionAuthentication',
     ],
+    # Throttles identify clients by IP. Only trust X-Forwarded-For entries
+    # added by our own proxies; with 0 the socket address is used.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES') or 0),
+    'DEFAULT_THROTTLE_RATES': {
+        'registration': '5/min',
+        'authorization': '10/min',
+        'jwt': '10/min',
+        'google_login': '10/min',
+        'product_write': '60/min',
+    },
 }
 
 QUERYCOUNT = {
@@ -106,15 +121,58 @@ WSGI_APPLICATION = 'shop_api.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'common.db.backends.postgresql',
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': os.environ.get('DB_PORT'),
+        # Keep connections open between requests and ping them before reuse.
+        # Under ASGI every request runs in a new thread, so the web_asgi service
+        # in docker-compose.yaml sets DB_POOL=on.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE') or 60),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# DB_POOL=on uses a psycopg (3) connection pool per process instead of
+# persistent connections. Size it so processes * DB_POOL_MAX_SIZE stays
+# below the server's max_connections.
+if os.environ.get('DB_POOL') == 'on':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE') or 2),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE') or 10),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT') or 10),
+            # CONN_HEALTH_CHECKS makes Django pass its own check= to the pool.
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE') or 300),
+        },
+    }
+
+# DB_ENGINE=sqlite3 runs the project (e.g. the benchmarks) without PostgreSQL.
+if os.environ.get('DB_ENGINE') == 'sqlite3':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / (os.environ.get('DB_NAME') or 'db.sqlite3'),
+    }
+
+
+# Read replicas for the product app, see common.routers. Comma separated
+# hosts (host or host:port) for PostgreSQL, or file names with DB_ENGINE=sqlite3.
+REPLICA_DATABASES = []
+for index, replica in enumerate(filter(None, (os.environ.get('DB_REPLICA_HOSTS') or '').split(',')), start=1):
+    alias = f'replica{index}'
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        DATABASES[alias] = {**DATABASES['default'], 'NAME': BASE_DIR / replica.strip()}
+    else:
+        host, _, port = replica.strip().partition(':')
+        DATABASES[alias] = {**DATABASES['default'], 'HOST': host, 'PORT': port or DATABASES['default']['PORT']}
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['common.routers.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -155,16 +213,31 @@ SWAGGER_SETTINGS = {
 
 CACHES = {
     "default": {
-        "BACKEND": "django_redis.cache.RedisCache",
+        "BACKEND": "common.cache.TwoTierRedisCache",
         "LOCATION": os.environ.get('REDIS_URL'),
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SERIALIZER": "common.cache.CompactSerializer",
+            "COMPRESSOR": "django_redis.compressors.zlib.ZlibCompressor",
+            "LOCAL_MAXSIZE": int(os.environ.get('CACHE_LOCAL_MAXSIZE') or 1024),
+            "LOCAL_TTL": float(os.environ.get('CACHE_LOCAL_TTL') or 5),
         }
     }
 }
 
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND')
+CELERY_TASK_IGNORE_RESULT = True
+
+EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT') or 25)
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS') == 'on'
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@shop.local')
+REPORT_RECIPIENTS = [email for email in os.environ.get('REPORT_RECIPIENTS', '').split(',') if email]
 
 
 # Internationalization
@@ -194,5 +267,17 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "UPDATE_LAST_LOGIN": True,
-
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.BlacklistTokenRefreshSerializer",
+    "TOKEN_VERIFY_SERIALIZER": "users.serializers.BlacklistTokenVerifySerializer",
 }
+
+# 'redis' keeps revoked refresh token ids in Redis until they expire,
+# 'database' uses the rest_framework_simplejwt.token_blacklist tables.
+JWT_BLACKLIST_BACKEND = os.environ.get('JWT_BLACKLIST_BACKEND') or 'redis'
+
+# Reviews embedded per product by products/reviews/ (?reviews=N, capped)
+LATEST_REVIEWS = int(os.environ.get('LATEST_REVIEWS') or 3)
+LATEST_REVIEWS_MAX = int(os.environ.get('LATEST_REVIEWS_MAX') or 20)
+
+# Serve list endpoints through product.encoders instead of DRF serializers
+FAST_LIST_SERIALIZATION = os.environ.get('FAST_LIST_SERIALIZATION') == 'on'
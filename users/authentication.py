@@ -0,0 +1,87 @@
+import copy
+
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from users.models import CustomUser
+
+# Users and tokens are read from the cache, then the database. The cache
+# backend keeps recent entries in process memory and evicts them in every
+# process when signals in users/signals.py delete a key.
+AUTH_CACHE_TIMEOUT = 60 * 5
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def token_cache_key(key):
+    return f'auth:token:{key}'
+
+
+def get_cached(key, loader):
+    value = cache.get(key)
+    if value is None:
+        value = loader()
+        cache.set(key, value, timeout=AUTH_CACHE_TIMEOUT)
+    # The in-process tier hands out shared objects; each request gets its own
+    # copy to attach to and modify.
+    return copy.copy(value)
+
+
+def invalidate(key):
+    cache.delete(key)
+
+
+def get_cached_user(user_id):
+    return get_cached(user_cache_key(user_id), lambda: CustomUser.objects.get(pk=user_id))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        model = self.get_model()
+
+        def load_token():
+            token = model.objects.get(key=key)
+            # Cache the token alone; the user is cached (and invalidated) separately.
+            return model(key=token.key, user_id=token.user_id, created=token.created)
+
+        try:
+            token = get_cached(token_cache_key(key), load_token)
+            user = get_cached_user(token.user_id)
+        except (model.DoesNotExist, CustomUser.DoesNotExist):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        token.user = user
+        return (user, token)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = get_cached_user(user_id)
+        except CustomUser.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
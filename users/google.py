@@ -0,0 +1,84 @@
+import os
+
+import jwt
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Endpoints are configurable so a local stub OAuth server can stand in for Google.
+GOOGLE_TOKEN_URL = os.environ.get('GOOGLE_TOKEN_URL') or 'https://oauth2.googleapis.com/token'
+GOOGLE_USERINFO_URL = os.environ.get('GOOGLE_USERINFO_URL') or 'https://www.googleapis.com/oauth2/v3/userinfo'
+GOOGLE_JWKS_URL = os.environ.get('GOOGLE_JWKS_URL') or 'https://www.googleapis.com/oauth2/v3/certs'
+GOOGLE_ISSUERS = ['https://accounts.google.com', 'accounts.google.com']
+GOOGLE_VERIFY_ID_TOKEN = (os.environ.get('GOOGLE_VERIFY_ID_TOKEN') or 'on') == 'on'
+
+# (connect, read) timeouts in seconds.
+GOOGLE_TIMEOUT = (3.05, 10)
+JWKS_LIFESPAN = 60 * 60
+
+
+class GoogleAuthError(Exception):
+    pass
+
+
+def build_session():
+    # POST is not in the default allowed_methods, so the single-use code
+    # exchange is only retried when the connection could not be established.
+    retry = Retry(total=3, backoff_factor=0.2, status_forcelist=(500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=20, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+session = build_session()
+jwk_client = jwt.PyJWKClient(GOOGLE_JWKS_URL, cache_keys=True, lifespan=JWKS_LIFESPAN, timeout=GOOGLE_TIMEOUT[1])
+
+
+def exchange_code(code):
+    try:
+        response = session.post(
+            GOOGLE_TOKEN_URL,
+            data={
+                "code": code,
+                "client_id": os.environ.get('GOOGLE_CLIENT_ID'),
+                "client_secret": os.environ.get('GOOGLE_CLIENT_SECRET'),
+                "redirect_uri": os.environ.get('GOOGLE_REDIRECT_URI'),
+                "grant_type": "authorization_code"
+            },
+            timeout=GOOGLE_TIMEOUT,
+        )
+        return response.json()
+    except (requests.RequestException, ValueError) as exc:
+        raise GoogleAuthError(f'Token exchange failed: {exc}')
+
+
+def verify_id_token(id_token):
+    # Keys are cached; PyJWKClient refetches the key set when the kid is unknown.
+    try:
+        signing_key = jwk_client.get_signing_key_from_jwt(id_token)
+        return jwt.decode(
+            id_token,
+            signing_key.key,
+            algorithms=['RS256'],
+            audience=os.environ.get('GOOGLE_CLIENT_ID'),
+            issuer=GOOGLE_ISSUERS,
+        )
+    except jwt.PyJWTError as exc:
+        raise GoogleAuthError(f'Invalid id_token: {exc}')
+
+
+def get_user_info(token_data):
+    id_token = token_data.get('id_token')
+    if GOOGLE_VERIFY_ID_TOKEN and id_token:
+        return verify_id_token(id_token)
+
+    try:
+        return session.get(
+            GOOGLE_USERINFO_URL,
+            headers={"Authorization": f"Bearer {token_data['access_token']}"},
+            timeout=GOOGLE_TIMEOUT,
+        ).json()
+    except (requests.RequestException, ValueError) as exc:
+        raise GoogleAuthError(f'Userinfo request failed: {exc}')
@@ -1,4 +1,18 @@
 from django.contrib.auth.models import BaseUserManager
+from django.db import connections, transaction
+from django.utils import timezone
+
+# Activates the user and returns their token key (creating the token if
+# needed) in one statement. No row comes back when the user doesn't exist.
+ACTIVATE_SQL = """
+WITH activated AS (
+    UPDATE {user} SET is_active = true, activated_at = %s WHERE id = %s RETURNING id
+)
+INSERT INTO {token} (key, user_id, created)
+SELECT %s, id, %s FROM activated
+ON CONFLICT (user_id) DO UPDATE SET key = {token}.key
+RETURNING key
+"""
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, username=None, password=None, **extra_fields):
@@ -27,3 +41,24 @@ class CustomUserManager(BaseUserManager):
             raise ValueError('SuperUser must have is_active')
         return self.create_user(email, username, password, **extra_fields)
 
+    def activate(self, user_id):
+        """Activate the user and return their API token key, or None if there is no such user."""
+        from rest_framework.authtoken.models import Token
+
+        now = timezone.now()
+        connection = connections[self.db]
+        if connection.vendor != 'postgresql':
+            with transaction.atomic(using=self.db):
+                if not self.filter(id=user_id).update(is_active=True, activated_at=now):
+                    return None
+                token, _ = Token.objects.using(self.db).get_or_create(user_id=user_id)
+            return token.key
+
+        sql = ACTIVATE_SQL.format(
+            user=connection.ops.quote_name(self.model._meta.db_table),
+            token=connection.ops.quote_name(Token._meta.db_table),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [now, user_id, Token.generate_key(), now])
+            row = cursor.fetchone()
+        return row[0] if row else None
@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 12:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_delete_confirmationcode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='date_joined',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='activated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
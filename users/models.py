@@ -16,6 +16,8 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=False)
 
     birthday = models.DateField(null=True, blank=True)
+    date_joined = models.DateTimeField(default=timezone.now)
+    activated_at = models.DateTimeField(null=True, blank=True)
 
     objects = CustomUserManager()
 
@@ -1,16 +1,51 @@
-import os
-import requests
+import json
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from rest_framework.generics import CreateAPIView
 from django.contrib.auth import get_user_model
+from common.throttling import SlidingWindowIPThrottle
+from users.google import GoogleAuthError, exchange_code, get_user_info
 from users.serializers import GoogleLoginSerializer
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from users.tokens import BlacklistRefreshToken
 
 User = get_user_model()
 
 
+def update_google_user(user, user_info):
+    user.first_name = user_info.get("given_name") or user.first_name
+    user.last_name = user_info.get("family_name") or user.last_name
+    user.avatar = user_info.get("picture") or user.avatar
+    if not user.is_active:
+        user.is_active = True
+        user.activated_at = timezone.now()
+
+
+def build_login_response(user):
+    refresh = BlacklistRefreshToken.for_user(user)
+    refresh["email"] = user.email
+
+    return {
+        "access": str(refresh.access_token),
+        "refresh": str(refresh),
+        "user": {
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "avatar": user.avatar
+        }
+    }
+
+
 class GoogleLoginAPIView(CreateAPIView):
     serializer_class = GoogleLoginSerializer
+    throttle_classes = [SlidingWindowIPThrottle]
+    throttle_scope = 'google_login'
 
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
@@ -18,56 +53,61 @@ class GoogleLoginAPIView(CreateAPIView):
 
         code = serializer.validated_data['code']
 
+        try:
+            token_data = exchange_code(code)
+            if not token_data.get("access_token"):
+                return Response({"error": "Invalid access token"}, status=400)
+            user_info = get_user_info(token_data)
+        except GoogleAuthError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        email = user_info.get("email")
+        if not email:
+            return Response({"error": "Email is not available"}, status=400)
 
-        token_response = requests.post(
-            "https://oauth2.googleapis.com/token",
-            data={
-                "code": code,
-                "client_id": os.environ.get('GOOGLE_CLIENT_ID'),
-                "client_secret": os.environ.get('GOOGLE_CLIENT_SECRET'),
-                "redirect_uri": os.environ.get('GOOGLE_REDIRECT_URI'),
-                "grant_type": "authorization_code"
-            }
-        )
+        user, created = User.objects.get_or_create(email=email)
+        update_google_user(user, user_info)
+        user.save()
 
-        token_data = token_response.json()
-        access_token = token_data.get("access_token")
+        return Response(build_login_response(user))
 
-        if not access_token:
-            return Response({"error": "Invalid access token"}, status=400)
 
+@csrf_exempt
+@require_POST
+async def google_login_async(request):
+    throttle = SlidingWindowIPThrottle()
+    if not await sync_to_async(throttle.allow_request)(request, GoogleLoginAPIView):
+        response = JsonResponse({"detail": "Request was throttled."}, status=429)
+        response['Retry-After'] = str(math.ceil(throttle.wait()))
+        return response
 
-        user_info = requests.get(
-            "https://www.googleapis.com/oauth2/v3/userinfo",
-            headers={"Authorization": f"Bearer {access_token}"}
-        ).json()
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
 
-        print(f"user_data {user_info}")
+    serializer = GoogleLoginSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
 
-        email = user_info.get("email")
-        first_name = user_info.get("given_name")
-        last_name = user_info.get("family_name")
-        picture = user_info.get("picture")
+    code = serializer.validated_data['code']
 
+    # requests is blocking, so the HTTP calls run in a worker thread and the
+    # event loop stays free for other requests.
+    try:
+        token_data = await sync_to_async(exchange_code, thread_sensitive=False)(code)
+        if not token_data.get("access_token"):
+            return JsonResponse({"error": "Invalid access token"}, status=400)
+        user_info = await sync_to_async(get_user_info, thread_sensitive=False)(token_data)
+    except GoogleAuthError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
 
-        user, created = User.objects.get_or_create(email=email)
+    email = user_info.get("email")
+    if not email:
+        return JsonResponse({"error": "Email is not available"}, status=400)
 
-        user.first_name = first_name or user.first_name
-        user.last_name = last_name or user.last_name
-        user.avatar = picture or user.avatar
-        user.is_active = True
-        user.save()
+    user, created = await User.objects.aget_or_create(email=email)
+    update_google_user(user, user_info)
+    await user.asave()
 
-        refresh = RefreshToken.for_user(user)
-        refresh["email"] = user.email
-
-        return Response({
-            "access": str(refresh.access_token),
-            "refresh": str(refresh),
-            "user": {
-                "email": user.email,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "avatar": user.avatar
-            }
-        })
+    return JsonResponse(await sync_to_async(build_login_response)(user))
@@ -1,8 +1,14 @@
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from .models import CustomUser
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from django.core.cache import cache
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+    TokenVerifySerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+from users.tokens import BlacklistRefreshToken, is_blacklisted, redis_blacklist_enabled
 
 class UserBaseSerializer(serializers.Serializer):
     email = serializers.CharField(max_length=150)
@@ -24,6 +30,8 @@ class RegisterValidateSerializer(UserBaseSerializer):
 
 
 class CustomTokenObtainSerializer(TokenObtainPairSerializer):
+    token_class = BlacklistRefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
@@ -32,30 +40,25 @@ class CustomTokenObtainSerializer(TokenObtainPairSerializer):
             token['birthday'] = user.birthday.isoformat()
         return token
 
-class GoogleLoginSerializer(serializers.Serializer):
-    code = serializers.CharField(required=True)
-
+class BlacklistTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = BlacklistRefreshToken
 
-class ConfirmationSerializer(serializers.Serializer):
-    user_id = serializers.IntegerField()
-    code = serializers.CharField(max_length=6)
 
+class BlacklistTokenVerifySerializer(TokenVerifySerializer):
     def validate(self, attrs):
-        user_id = attrs.get('user_id')
-        code = attrs.get('code')
+        if not redis_blacklist_enabled():
+            return super().validate(attrs)
 
-        try:
-            user = CustomUser.objects.get(id=user_id)
-        except CustomUser.DoesNotExist:
-            raise ValidationError('Пользователь не существует!')
+        token = UntypedToken(attrs["token"])
+        if api_settings.BLACKLIST_AFTER_ROTATION and is_blacklisted(token.get(api_settings.JTI_CLAIM)):
+            raise ValidationError("Token is blacklisted")
+        return {}
 
-        cache_key = f"confirmation_code_{user_id}"
-        stored_code = cache.get(cache_key)
 
-        if stored_code is None:
-            raise ValidationError('Код подтверждения истёк или не существует!')
+class GoogleLoginSerializer(serializers.Serializer):
+    code = serializers.CharField(required=True)
 
-        if stored_code != code:
-            raise ValidationError('Неверный код подтверждения!')
 
-        return attrs
+class ConfirmationSerializer(serializers.Serializer):
+    user_id = serializers.IntegerField()
+    code = serializers.CharField(max_length=6)
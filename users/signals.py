@@ -0,0 +1,26 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from users.authentication import invalidate, token_cache_key, user_cache_key
+from users.models import CustomUser
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, using, **kwargs):
+    key = user_cache_key(instance.pk)
+    invalidate(key)
+    # Again once committed: a request in between may have cached the old row.
+    transaction.on_commit(partial(invalidate, key), using=using)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, using, **kwargs):
+    key = token_cache_key(instance.key)
+    invalidate(key)
+    transaction.on_commit(partial(invalidate, key), using=using)
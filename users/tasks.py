@@ -1,27 +1,134 @@
+import json
+import logging
+from datetime import timedelta
+from smtplib import SMTPException, SMTPRecipientsRefused, SMTPResponseException, SMTPSenderRefused
+
 from celery import shared_task
-import time
+from django.conf import settings
+from django.utils import timezone
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django_redis import get_redis_connection
+from reports.builder import build_daily_report, render_report
+from reports.rollups import update_rollups
 import random
 
-@shared_task
+logger = logging.getLogger(__name__)
+
+OTP_PENDING_KEY = 'otp:pending'
+# Messages the server rejected permanently, kept for inspection.
+OTP_FAILED_KEY = 'otp:failed'
+OTP_FAILED_LIMIT = 1000
+OTP_BATCH_SIZE = 100
+OTP_RETRY_DELAY = 10
+OTP_RETRY_MAX_DELAY = 300
+# Set while a flush is scheduled, so an outage queues one retry, not one per failure.
+OTP_FLUSH_SCHEDULED_KEY = 'otp:flush_scheduled'
+
+
+def take_pending_otps(redis):
+    pipe = redis.pipeline()
+    pipe.lrange(OTP_PENDING_KEY, 0, OTP_BATCH_SIZE - 1)
+    pipe.ltrim(OTP_PENDING_KEY, OTP_BATCH_SIZE, -1)
+    items, _ = pipe.execute()
+    return items
+
+
+def build_otp_message(user_email, code):
+    return EmailMessage(
+        subject='Код подтверждения',
+        body=f'Ваш код подтверждения: {code}',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user_email],
+    )
+
+
+def is_permanent_failure(error):
+    # A refused recipient (5xx) will never succeed, everything else (lost
+    # connection, 4xx, a refused sender) may work on the next attempt.
+    if isinstance(error, SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, SMTPSenderRefused):
+        return False
+    return isinstance(error, SMTPResponseException) and error.smtp_code >= 500
+
+
+def drain_otp_emails():
+    # Everything queued while we send is picked up by the same SMTP
+    # connection, so a burst of registrations costs one connection. Messages
+    # are sent one by one so a bad address only fails its own message.
+    redis = get_redis_connection('default')
+    connection = get_connection(fail_silently=False)
+    connection.open()
+    sent = 0
+    try:
+        while True:
+            items = take_pending_otps(redis)
+            if not items:
+                break
+            for index, item in enumerate(items):
+                try:
+                    sent += connection.send_messages([build_otp_message(*json.loads(item))])
+                except (SMTPException, OSError) as error:
+                    if not is_permanent_failure(error):
+                        redis.lpush(OTP_PENDING_KEY, *reversed(items[index:]))
+                        raise
+                    pipe = redis.pipeline()
+                    pipe.rpush(OTP_FAILED_KEY, item)
+                    pipe.ltrim(OTP_FAILED_KEY, -OTP_FAILED_LIMIT, -1)
+                    pipe.execute()
+    finally:
+        connection.close()
+    return sent
+
+
+def schedule_flush(redis, attempt=0):
+    delay = min(OTP_RETRY_DELAY * 2 ** attempt, OTP_RETRY_MAX_DELAY)
+    # The flag outlives the countdown, and expires on its own if the task is lost.
+    if redis.set(OTP_FLUSH_SCHEDULED_KEY, 1, nx=True, ex=delay * 2):
+        flush_otp_emails.apply_async(args=(attempt,), countdown=delay)
+
+
+@shared_task(ignore_result=True)
 def send_opt_email(user_email, code):
-    print("Sending...")
-    time.sleep(20)
-    print("Email sent")
+    redis = get_redis_connection('default')
+    redis.rpush(OTP_PENDING_KEY, json.dumps([user_email, code]))
+    try:
+        drain_otp_emails()
+    except (SMTPException, OSError):
+        logger.warning('Sending OTP emails failed, retrying later', exc_info=True)
+        schedule_flush(redis)
 
-@shared_task
+
+@shared_task(ignore_result=True)
+def flush_otp_emails(attempt=0):
+    redis = get_redis_connection('default')
+    redis.delete(OTP_FLUSH_SCHEDULED_KEY)
+    try:
+        drain_otp_emails()
+    except (SMTPException, OSError):
+        logger.warning('Flushing OTP emails failed (attempt %d)', attempt + 1, exc_info=True)
+        schedule_flush(redis, attempt + 1)
+
+
+@shared_task(ignore_result=True)
 def send_daily_report():
-    print("sending daily report ....")
-    time.sleep(50)
-    print("daily report sent")
+    # Reads only the rollup tables, see reports.rollups.
+    update_rollups()
+    yesterday = timezone.localdate() - timedelta(days=1)
+    report = render_report(build_daily_report(today=yesterday))
+    if settings.REPORT_RECIPIENTS:
+        send_mail('Ежедневный отчёт', report, settings.DEFAULT_FROM_EMAIL, settings.REPORT_RECIPIENTS)
+    else:
+        logger.info('Daily report for %s:\n%s', yesterday, report)
 
-@shared_task
+@shared_task(ignore_result=True)
 def generate_random_number():
     number = random.randint(1000, 9999)
     print(f"Generated number: {number}")
     with open("random_numbers.txt", "a") as f:
         f.write(f"{number}\n")
 
-@shared_task
+@shared_task(ignore_result=True)
 def clear_old_logs():
     import os
 
@@ -30,4 +137,4 @@ def clear_old_logs():
             f.write("")
         print("Old logs cleared")
     else:
-        print("Log file does not exist.")
\ No newline at end of file
+        print("Log file does not exist.")
@@ -1,3 +1,219 @@
-from django.test import TestCase
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from smtplib import SMTPServerDisconnected
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.core import mail
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django_redis import get_redis_connection
+from jwt.algorithms import RSAAlgorithm
+
+from rest_framework.authtoken.models import Token
+
+from users import google, tasks
+from users.models import CustomUser
+from users.utils import set_confirmation_code
+
+CLIENT_ID = 'test-client-id'
+
+
+def make_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwk.update(kid=kid, use='sig', alg='RS256')
+    return private_key, jwk
+
+
+def sign_id_token(private_key, kid, email):
+    now = int(time.time())
+    claims = {
+        'iss': 'https://accounts.google.com',
+        'aud': CLIENT_ID,
+        'sub': '1234567890',
+        'email': email,
+        'given_name': 'Test',
+        'iat': now,
+        'exp': now + 300,
+    }
+    return jwt.encode(claims, private_key, algorithm='RS256', headers={'kid': kid})
+
+
+class StubOAuthHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.respond(self.server.token_response)
+
+    def do_GET(self):
+        if self.path == '/certs':
+            self.respond({'keys': self.server.jwks})
+        else:
+            self.respond(self.server.userinfo)
+
+    def respond(self, payload):
+        self.server.calls.append(self.path)
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GoogleOAuthStubTests(SimpleTestCase):
+    """Runs the Google login helpers against a local stub OAuth server."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubOAuthHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.private_key, jwk = make_key('key-1')
+        self.server.jwks = [jwk]
+        self.server.userinfo = {'email': 'userinfo@example.com'}
+        self.server.token_response = {'access_token': 'access'}
+        self.server.calls = []
+
+        jwk_client = jwt.PyJWKClient(f'{self.base_url}/certs', cache_keys=True, lifespan=google.JWKS_LIFESPAN)
+        for patcher in (
+            mock.patch.dict(os.environ, {'GOOGLE_CLIENT_ID': CLIENT_ID}),
+            mock.patch.object(google, 'GOOGLE_TOKEN_URL', f'{self.base_url}/token'),
+            mock.patch.object(google, 'GOOGLE_USERINFO_URL', f'{self.base_url}/userinfo'),
+            mock.patch.object(google, 'GOOGLE_VERIFY_ID_TOKEN', True),
+            mock.patch.object(google, 'jwk_client', jwk_client),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def login(self):
+        return google.get_user_info(google.exchange_code('code'))
+
+    def test_id_token_is_verified_locally(self):
+        self.server.token_response['id_token'] = sign_id_token(self.private_key, 'key-1', 'token@example.com')
+
+        self.assertEqual(self.login()['email'], 'token@example.com')
+        self.assertEqual(self.server.calls, ['/token', '/certs'])
+
+        # With the key set cached a login is a single upstream call.
+        self.server.calls = []
+        self.assertEqual(self.login()['email'], 'token@example.com')
+        self.assertEqual(self.server.calls, ['/token'])
+
+    def test_userinfo_is_used_without_id_token(self):
+        self.assertEqual(self.login()['email'], 'userinfo@example.com')
+        self.assertEqual(self.server.calls, ['/token', '/userinfo'])
+
+    def test_userinfo_is_used_when_verification_is_off(self):
+        self.server.token_response['id_token'] = sign_id_token(self.private_key, 'key-1', 'token@example.com')
+        with mock.patch.object(google, 'GOOGLE_VERIFY_ID_TOKEN', False):
+            self.assertEqual(self.login()['email'], 'userinfo@example.com')
+        self.assertEqual(self.server.calls, ['/token', '/userinfo'])
+
+    def test_unknown_kid_refreshes_key_set(self):
+        self.server.token_response['id_token'] = sign_id_token(self.private_key, 'key-1', 'token@example.com')
+        self.login()
+
+        rotated_key, rotated_jwk = make_key('key-2')
+        self.server.jwks = [rotated_jwk]
+        self.server.token_response['id_token'] = sign_id_token(rotated_key, 'key-2', 'rotated@example.com')
+        self.server.calls = []
+
+        self.assertEqual(self.login()['email'], 'rotated@example.com')
+        self.assertEqual(self.server.calls, ['/token', '/certs'])
+
+    def test_forged_id_token_is_rejected(self):
+        forged_key, _ = make_key('key-1')
+        self.server.token_response['id_token'] = sign_id_token(forged_key, 'key-1', 'token@example.com')
+
+        with self.assertRaises(google.GoogleAuthError):
+            self.login()
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class OtpEmailOutageTests(SimpleTestCase):
+    """OTP emails queued during an SMTP outage go out once it recovers."""
+
+    def setUp(self):
+        self.redis = get_redis_connection('default')
+        keys = (tasks.OTP_PENDING_KEY, tasks.OTP_FAILED_KEY, tasks.OTP_FLUSH_SCHEDULED_KEY)
+        self.redis.delete(*keys)
+        self.addCleanup(self.redis.delete, *keys)
+        patcher = mock.patch.object(tasks.flush_otp_emails, 'apply_async')
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def smtp_down(self):
+        return mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=SMTPServerDisconnected('Connection unexpectedly closed'),
+        )
+
+    def test_outage_then_recovery(self):
+        emails = [f'user{i}@example.com' for i in range(3)]
+        with self.smtp_down():
+            for email in emails:
+                tasks.send_opt_email(email, '1234')
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(self.redis.llen(tasks.OTP_PENDING_KEY), 3)
+        # However many sends failed, a single flush is waiting.
+        self.apply_async.assert_called_once_with(args=(0,), countdown=tasks.OTP_RETRY_DELAY)
+
+        # The scheduled flush fails too and backs off.
+        with self.smtp_down():
+            tasks.flush_otp_emails(0)
+        self.assertEqual(self.apply_async.call_count, 2)
+        self.assertEqual(self.apply_async.call_args.kwargs, {'args': (1,), 'countdown': tasks.OTP_RETRY_DELAY * 2})
+
+        tasks.flush_otp_emails(1)
+        self.assertEqual([message.to for message in mail.outbox], [[email] for email in emails])
+        self.assertEqual(self.redis.llen(tasks.OTP_PENDING_KEY), 0)
+        self.assertEqual(self.apply_async.call_count, 2)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Activation is a single statement on PostgreSQL only')
+class ConfirmUserTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='new@example.com', password='password')
+        self.code = set_confirmation_code(self.user.id)
+
+    def confirm(self, user_id, code):
+        return self.client.post('/api/v1/users/confirm/', {'user_id': user_id, 'code': code},
+                                content_type='application/json')
+
+    def test_confirm_is_one_statement(self):
+        with self.assertNumQueries(1):
+            response = self.confirm(self.user.id, self.code)
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+        self.assertIsNotNone(self.user.activated_at)
+        self.assertEqual(response.json()['key'], Token.objects.get(user=self.user).key)
+
+    def test_existing_token_is_returned(self):
+        token = Token.objects.create(user=self.user)
+        response = self.confirm(self.user.id, self.code)
+        self.assertEqual(response.json()['key'], token.key)
+
+    def test_unknown_user(self):
+        code = set_confirmation_code(self.user.id + 1000)
+        with self.assertNumQueries(1):
+            response = self.confirm(self.user.id + 1000, code)
+        self.assertEqual(response.status_code, 400)
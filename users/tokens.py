@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from django_redis import get_redis_connection
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+
+BLACKLIST_KEY = 'jwt:blacklist:{jti}'
+
+
+def redis_blacklist_enabled():
+    # 'database' falls back to simplejwt's OutstandingToken/BlacklistedToken tables.
+    return settings.JWT_BLACKLIST_BACKEND == 'redis'
+
+
+def is_blacklisted(jti):
+    return bool(get_redis_connection('default').exists(BLACKLIST_KEY.format(jti=jti)))
+
+
+def blacklist_jti(jti, exp):
+    # The entry only has to live as long as the token itself would.
+    ttl = int(exp - datetime.now(timezone.utc).timestamp())
+    if ttl > 0:
+        get_redis_connection('default').set(BLACKLIST_KEY.format(jti=jti), 1, ex=ttl)
+
+
+class BlacklistRefreshToken(RefreshToken):
+    def check_blacklist(self):
+        if not redis_blacklist_enabled():
+            return super().check_blacklist()
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        if not redis_blacklist_enabled():
+            return super().blacklist()
+        blacklist_jti(self.payload[api_settings.JTI_CLAIM], self.payload["exp"])
+
+    def outstand(self):
+        if not redis_blacklist_enabled():
+            return super().outstand()
+        return None
+
+    @classmethod
+    def for_user(cls, user):
+        if not redis_blacklist_enabled():
+            return super().for_user(user)
+        # Skip BlacklistMixin.for_user, which writes an OutstandingToken row.
+        return super(BlacklistMixin, cls).for_user(user)
@@ -6,7 +6,7 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView
 )
 from users.views import CustomTokenObtainPairView
-from users.oauth import GoogleLoginAPIView
+from users.oauth import GoogleLoginAPIView, google_login_async
 
 urlpatterns = [
     path('registration/', RegistrationAPIView.as_view()),
@@ -18,4 +18,5 @@ urlpatterns = [
     path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
 
     path('google-login/', GoogleLoginAPIView.as_view()),
+    path('google-login/async/', google_login_async),
 ]
\ No newline at end of file
@@ -1,24 +1,62 @@
 import random
 import string
-from django.core.cache import cache
+from django_redis import get_redis_connection
 
 CODE_EXPIRATION = 300
+MAX_CODE_ATTEMPTS = 5
+
+# Both keys share a hash tag so the script also works on Redis Cluster.
+CODE_KEY = 'confirmation:{{{user_id}}}:code'
+ATTEMPTS_KEY = 'confirmation:{{{user_id}}}:attempts'
+
+CODE_CONFIRMED = 1
+CODE_INVALID = 0
+CODE_EXPIRED = -1
+CODE_TOO_MANY_ATTEMPTS = -2
+
+# Checks the code, consumes it on success and counts failed attempts, all in
+# one round trip. Too many failures burn the code.
+VERIFY_SCRIPT = """
+local stored = redis.call('GET', KEYS[1])
+if not stored then
+    return -1
+end
+if stored == ARGV[1] then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return 1
+end
+local attempts = redis.call('INCR', KEYS[2])
+if attempts == 1 then
+    redis.call('PEXPIRE', KEYS[2], redis.call('PTTL', KEYS[1]))
+end
+if attempts >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return -2
+end
+return 0
+"""
+
+_verify_script = None
+
 
 def generate_confirmation_code():
     return ''.join(random.choices(string.digits, k=6))
 
-def set_confirmation_code(user_id):
-    cache_key = f"confirmation_code_{user_id}"
-    cache.delete(cache_key)
 
+def set_confirmation_code(user_id):
     code = generate_confirmation_code()
-    cache.set(cache_key, code, timeout=CODE_EXPIRATION)
+    pipe = get_redis_connection('default').pipeline(transaction=True)
+    pipe.set(CODE_KEY.format(user_id=user_id), code, ex=CODE_EXPIRATION)
+    pipe.delete(ATTEMPTS_KEY.format(user_id=user_id))
+    pipe.execute()
     return code
 
-def get_confirmation_code(user_id):
-    cache_key = f"confirmation_code_{user_id}"
-    return cache.get(cache_key)
 
-def delete_confirmation_code(user_id):
-    cache_key = f"confirmation_code_{user_id}"
-    cache.delete(cache_key)
+def verify_confirmation_code(user_id, code):
+    global _verify_script
+    if _verify_script is None:
+        _verify_script = get_redis_connection('default').register_script(VERIFY_SCRIPT)
+    return _verify_script(
+        keys=[CODE_KEY.format(user_id=user_id), ATTEMPTS_KEY.format(user_id=user_id)],
+        args=[code, MAX_CODE_ATTEMPTS],
+    )
@@ -12,16 +12,24 @@ from .serializers import (
     RegisterValidateSerializer,
     AuthValidateSerializer,
 )
-from users.utils import get_confirmation_code, delete_confirmation_code
+from users.utils import (
+    CODE_CONFIRMED,
+    CODE_EXPIRED,
+    CODE_TOO_MANY_ATTEMPTS,
+    verify_confirmation_code,
+)
 import random
 import string
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from users.serializers import CustomTokenObtainSerializer
 from users.serializers import ConfirmationSerializer
 from users.tasks import send_opt_email
+from common.throttling import SlidingWindowIPThrottle
 
 class AuthorizationAPIView(CreateAPIView):
     serializer_class = AuthValidateSerializer
+    throttle_classes = [SlidingWindowIPThrottle]
+    throttle_scope = 'authorization'
     def post(self, request):
         serializer = AuthValidateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -46,6 +54,8 @@ class AuthorizationAPIView(CreateAPIView):
 
 class RegistrationAPIView(CreateAPIView):
     serializer_class = RegisterValidateSerializer
+    throttle_classes = [SlidingWindowIPThrottle]
+    throttle_scope = 'registration'
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -87,31 +97,36 @@ class ConfirmUserAPIView(CreateAPIView):
         user_id = serializer.validated_data['user_id']
         input_code = serializer.validated_data['code']
 
-        stored_code = get_confirmation_code(user_id)
+        result = verify_confirmation_code(user_id, input_code)
 
-        if stored_code is None:
+        if result == CODE_EXPIRED:
             return Response({'detail': 'Код подтверждения истёк или не существует.'},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        if stored_code != input_code:
-            return Response({'detail': 'Неверный код подтверждения.'},
+        if result == CODE_TOO_MANY_ATTEMPTS:
+            return Response({'detail': 'Слишком много попыток. Запросите новый код.'},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        with transaction.atomic():
-            user = CustomUser.objects.get(id=user_id)
-            user.is_active = True
-            user.save()
-
-            delete_confirmation_code(user_id)
+        if result != CODE_CONFIRMED:
+            return Response({'detail': 'Неверный код подтверждения.'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-            token, _ = Token.objects.get_or_create(user=user)
+        # One statement activates the user and creates their token. The
+        # auth cache needs no invalidation: an inactive user has neither a
+        # token nor a JWT, so it can't have been cached.
+        key = CustomUser.objects.activate(user_id)
+        if key is None:
+            return Response({'detail': 'Пользователь не существует!'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
         return Response(
             status=status.HTTP_200_OK,
             data={
                 'message': 'User аккаунт успешно активирован',
-                'key': token.key
+                'key': key
             }
         )
 class CustomTokenObtainPairView(TokenObtainPairView):
-    serializer_class = CustomTokenObtainSerializer
\ No newline at end of file
+    serializer_class = CustomTokenObtainSerializer
+    throttle_classes = [SlidingWindowIPThrottle]
+    throttle_scope = 'jwt'